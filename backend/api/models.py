@@ -4,17 +4,53 @@ Pydantic models for API request/response validation.
 These models define the structure of data sent to and from the API.
 """
 
-from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List, Dict, Any
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field
+from typing import Annotated, Optional, List, Dict, Any
 from datetime import datetime
-from enum import Enum
+from enum import Enum, EnumMeta
+import re
+
+# True when this module was built as a C extension by setup.py
+compiled = not __file__.endswith(".py")
 
 
 # ============================================================================
 # Enums
 # ============================================================================
 
-class PracticeMode(str, Enum):
+class _FastStrEnumMeta(EnumMeta):
+    """Enum metaclass that resolves values with a single dict lookup."""
+
+    def __call__(cls, value: Any, *args: Any, **kwargs: Any) -> Enum:
+        """
+        Look up a member by value, bypassing EnumMeta's generic dispatch.
+
+        Args:
+            value: Member value (or class name for the functional API).
+            *args: Functional API arguments, passed through unchanged.
+            **kwargs: Functional API arguments, passed through unchanged.
+
+        Returns:
+            Enum: Matching enum member.
+        """
+        if not args and not kwargs:
+            try:
+                return cls._value2member_map_[value]
+            except (KeyError, TypeError):
+                pass
+        return super().__call__(value, *args, **kwargs)
+
+
+class FastStrEnum(str, Enum, metaclass=_FastStrEnumMeta):
+    """
+    String enum with fast value lookup.
+
+    Members are str instances, so they can be passed anywhere a plain
+    string is expected without reading .value.
+    """
+
+
+class PracticeMode(FastStrEnum):
     """Practice session modes."""
     BALANCED = "balanced"
     WEAK_FOCUS = "weak_focus"
@@ -22,7 +58,7 @@ class PracticeMode(str, Enum):
     COMPETITION = "competition"
 
 
-class QuestionType(str, Enum):
+class QuestionType(FastStrEnum):
     """Question types."""
     MULTIPLE_CHOICE = "multiple_choice"
     CODE_TRACE = "code_trace"
@@ -31,7 +67,7 @@ class QuestionType(str, Enum):
     TRUE_FALSE = "true_false"
 
 
-class MasteryLevel(str, Enum):
+class MasteryLevel(FastStrEnum):
     """Mastery levels for topics."""
     NOVICE = "novice"
     DEVELOPING = "developing"
@@ -40,14 +76,53 @@ class MasteryLevel(str, Enum):
     MASTER = "master"
 
 
+# ============================================================================
+# Base Models
+# ============================================================================
+
+class ResponseModel(BaseModel):
+    """
+    Base class for response models.
+
+    Responses are built once and never mutated, so instances are frozen
+    and reject unexpected fields.
+    """
+    model_config = ConfigDict(from_attributes=True, frozen=True, extra="forbid")
+
+
 # ============================================================================
 # User Models
 # ============================================================================
 
+# Loose shape check (local@domain.tld); deliverability is not verified
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+def validate_email(value: str) -> str:
+    """
+    Validate that a string looks like an email address.
+
+    Args:
+        value: Candidate email address.
+
+    Returns:
+        str: The unchanged address.
+
+    Raises:
+        ValueError: If the address does not match EMAIL_RE.
+    """
+    if not EMAIL_RE.match(value):
+        raise ValueError("value is not a valid email address")
+    return value
+
+
+Email = Annotated[str, AfterValidator(validate_email)]
+
+
 class UserCreate(BaseModel):
     """Request model for user registration."""
     username: str = Field(..., min_length=3, max_length=50)
-    email: EmailStr
+    email: Email
     password: str = Field(..., min_length=8)
     full_name: Optional[str] = None
 
@@ -58,7 +133,7 @@ class UserLogin(BaseModel):
     password: str
 
 
-class UserResponse(BaseModel):
+class UserResponse(ResponseModel):
     """Response model for user data."""
     id: int
     username: str
@@ -67,11 +142,8 @@ class UserResponse(BaseModel):
     is_active: bool
     created_at: datetime
 
-    class Config:
-        from_attributes = True
 
-
-class Token(BaseModel):
+class Token(ResponseModel):
     """Response model for authentication tokens."""
     access_token: str
     token_type: str = "bearer"
@@ -96,7 +168,7 @@ class AnswerSubmitRequest(BaseModel):
     hints_used: int = 0
 
 
-class AnswerExplanation(BaseModel):
+class AnswerExplanation(ResponseModel):
     """Explanation for an answer."""
     text: str
     why_right: Optional[str] = None
@@ -104,7 +176,7 @@ class AnswerExplanation(BaseModel):
     common_mistake: Optional[str] = None
 
 
-class QuestionResponse(BaseModel):
+class QuestionResponse(ResponseModel):
     """Response model for a question."""
     id: int
     question_text: str
@@ -117,7 +189,7 @@ class QuestionResponse(BaseModel):
     practice_context: Optional[str] = None  # "Practicing: X (Your accuracy: Y%)"
 
 
-class AnswerSubmitResponse(BaseModel):
+class AnswerSubmitResponse(ResponseModel):
     """Response after submitting an answer."""
     result: str  # "correct" or "incorrect"
     selected_answer: int
@@ -130,7 +202,7 @@ class AnswerSubmitResponse(BaseModel):
 # Competency Models
 # ============================================================================
 
-class CompetencyResponse(BaseModel):
+class CompetencyResponse(ResponseModel):
     """Response model for a single competency."""
     topic_id: str
     topic_name: str
@@ -141,7 +213,7 @@ class CompetencyResponse(BaseModel):
     last_practiced: Optional[datetime]
 
 
-class CompetencyDashboard(BaseModel):
+class CompetencyDashboard(ResponseModel):
     """Response model for competency dashboard."""
     overall_progress: float  # 0-100
     competition_readiness: int  # 0-100
@@ -163,7 +235,7 @@ class PreferencesUpdateRequest(BaseModel):
     sound_enabled: Optional[bool] = None
 
 
-class PreferencesResponse(BaseModel):
+class PreferencesResponse(ResponseModel):
     """Response model for user preferences."""
     practice_mode: PracticeMode
     show_explanations: bool
@@ -172,15 +244,12 @@ class PreferencesResponse(BaseModel):
     theme: str
     sound_enabled: bool
 
-    class Config:
-        from_attributes = True
-
 
 # ============================================================================
 # Progress Models
 # ============================================================================
 
-class LevelProgress(BaseModel):
+class LevelProgress(ResponseModel):
     """Progress for a single level."""
     level: int
     status: str  # locked, in_progress, completed
@@ -189,7 +258,7 @@ class LevelProgress(BaseModel):
     completed_at: Optional[datetime] = None
 
 
-class ProgressResponse(BaseModel):
+class ProgressResponse(ResponseModel):
     """Response model for user progress."""
     levels: List[LevelProgress]
     total_points: int
@@ -201,7 +270,7 @@ class ProgressResponse(BaseModel):
 # Badge Models
 # ============================================================================
 
-class BadgeResponse(BaseModel):
+class BadgeResponse(ResponseModel):
     """Response model for a badge."""
     id: int
     badge_id: str
@@ -211,6 +280,3 @@ class BadgeResponse(BaseModel):
     category: str
     earned: bool
     earned_at: Optional[datetime] = None
-
-    class Config:
-        from_attributes = True
@@ -0,0 +1,31 @@
+"""
+Response classes for the Code Craze API.
+
+Provides an orjson-backed JSON response used as the application default.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response serialized with orjson.
+
+    orjson encodes dicts, lists, datetimes and enums natively in Rust, so
+    handlers returning this class skip FastAPI's jsonable_encoder walk.
+    """
+
+    def render(self, content: Any) -> bytes:
+        """
+        Serialize response content to JSON bytes.
+
+        Args:
+            content: JSON-compatible response payload.
+
+        Returns:
+            bytes: Encoded JSON body.
+        """
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -4,18 +4,45 @@ API routes for Code Craze Study Guide.
 This module defines all API endpoints for the application.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Response, status
+from sqlalchemy import insert, select
+from sqlalchemy.orm import load_only
 from typing import List
+from collections import deque
 
-from backend.database.db import get_db
+import orjson
+from cachetools import TTLCache
+
+from backend.database.db import SessionLocal
 from backend.api import models as api_models
+from backend.api.responses import ORJSONResponse
+from backend.api.serializers import dump_submit_answer
 from backend.database import models as db_models
-from backend.services import competency_service, adaptive_learning
+from backend.services import competency_service, adaptive_learning, dashboard_service, trend_service
 
 # Create main router
 router = APIRouter()
 
+# Pre-serialized /info payload (constant for the life of the process)
+_INFO_BYTES = orjson.dumps({
+    "name": "Code Craze Academy",
+    "version": "0.1.0",
+    "description": "Interactive learning platform for Science Olympiad Code Craze",
+    "port": 8989,
+})
+
+# (dashboard_version, serialized dashboard) keyed by user_id. Each worker
+# process has its own copy and a submit only evicts the local entry, so hits
+# are checked against the database version before being served.
+_comp_cache: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+# (practice mode, prefetched questions) per practice session, served one at
+# a time by /next. Per-process: a request landing on another worker finds no
+# queue and /next refills it from the adaptive algorithm.
+_session_queues: TTLCache = TTLCache(maxsize=10_000, ttl=3600)
+QUEUE_BATCH_SIZE = 10
+QUEUE_REFILL_THRESHOLD = 3
+
 
 # ============================================================================
 # Health and Info Endpoints
@@ -29,12 +56,7 @@ async def get_info():
     Returns:
         dict: Application name, version, and description.
     """
-    return {
-        "name": "Code Craze Academy",
-        "version": "0.1.0",
-        "description": "Interactive learning platform for Science Olympiad Code Craze",
-        "port": 8989,
-    }
+    return Response(content=_INFO_BYTES, media_type="application/json")
 
 
 # ============================================================================
@@ -51,7 +73,7 @@ async def get_current_user():
     Returns:
         dict: User information.
     """
-    return {"message": "Authentication not yet implemented"}
+    return ORJSONResponse(content={"message": "Authentication not yet implemented"})
 
 
 # ============================================================================
@@ -59,15 +81,12 @@ async def get_current_user():
 # ============================================================================
 
 @router.get("/competencies")
-async def get_competencies(db: Session = Depends(get_db)):
+async def get_competencies():
     """
     Get user's competency dashboard.
 
     Shows accuracy, mastery level, and trends across all topics.
 
-    Args:
-        db: Database session.
-
     Returns:
         dict: Competency dashboard data.
     """
@@ -75,138 +94,144 @@ async def get_competencies(db: Session = Depends(get_db)):
     # For now, use test user (id=1)
     user_id = 1
 
-    # Get competencies
-    competencies = competency_service.get_user_competencies(db, user_id)
+    db = SessionLocal()
 
-    # Calculate competition readiness
-    readiness, breakdown = competency_service.calculate_competition_readiness(db, user_id)
+    version = await db.run_sync(dashboard_service.dashboard_version, user_id)
+    cached = _comp_cache.get(user_id)
+    if cached is not None and cached[0] == version:
+        return Response(content=cached[1], media_type="application/json")
 
-    # Get recommendations
-    recommendations = competency_service.get_recommendations(db, user_id)
+    dashboard = await db.run_sync(dashboard_service.get_dashboard, user_id)
 
-    return {
-        "overall_progress": breakdown.get("total", 0),
-        "competition_readiness": readiness,
-        "competencies": competencies,
-        "recommendations": recommendations,
-    }
+    response = ORJSONResponse(content=dashboard)
+    _comp_cache[user_id] = (version, response.body)
+
+    return response
 
 
 @router.get("/competencies/{topic_id}")
-async def get_topic_competency(topic_id: str, db: Session = Depends(get_db)):
+async def get_topic_competency(topic_id: str):
     """
     Get detailed competency for a specific topic.
 
     Args:
         topic_id: Topic identifier (e.g., "1.1_karel_commands").
-        db: Database session.
 
     Returns:
         dict: Detailed topic competency data.
     """
     # TODO: Implement after authentication
-    return {
+    return ORJSONResponse(content={
         "topic_id": topic_id,
         "mastery_level": "novice",
         "accuracy": 0.0,
         "total_attempts": 0,
-    }
+    })
 
 
 @router.get("/recommendations")
-async def get_recommendations(db: Session = Depends(get_db)):
+async def get_recommendations():
     """
     Get recommended focus areas based on competencies.
 
     Analyzes user performance and suggests topics to practice.
 
-    Args:
-        db: Database session.
-
     Returns:
         list: Recommended topics with reasons.
     """
     # TODO: Implement recommendation algorithm
-    return {
+    return ORJSONResponse(content={
         "recommendations": [],
-    }
+    })
 
 
 # ============================================================================
 # Practice Session Endpoints
 # ============================================================================
 
+def format_question(question: db_models.Question, context: str) -> dict:
+    """
+    Format a question for the client.
+
+    Args:
+        question: Selected question, loaded with user_answers (answer text
+            only, without the correct flag).
+        context: Context string explaining the selection.
+
+    Returns:
+        dict: Question data for the response.
+    """
+    return {
+        "id": question.id,
+        "question_text": question.question_text,
+        "question_type": question.question_type,
+        "topic_id": question.topic_id,
+        "difficulty": question.difficulty,
+        "answers": question.user_answers,
+        "code_snippet": question.code_snippet,
+        "image_url": question.image_url,
+        "practice_context": context
+    }
+
+
 @router.post("/practice/start")
 async def start_practice_session(
-    request: api_models.PracticeStartRequest,
-    db: Session = Depends(get_db)
+    request: api_models.PracticeStartRequest
 ):
     """
     Start a new practice session.
 
-    Selects questions based on user's practice mode and competencies.
+    Selects a batch of questions based on user's practice mode and
+    competencies, returns the first and queues the rest for /next.
 
     Args:
         request: Practice session configuration.
-        db: Database session.
 
     Returns:
         dict: Practice session ID and first question.
     """
     # TODO: Get user_id from authentication
     user_id = 1
+    session_id = f"session_{user_id}"
+    db = SessionLocal()
 
-    # Select first question using adaptive algorithm
-    question, context = adaptive_learning.select_next_question(
-        db,
+    # Select questions using adaptive algorithm
+    batch = await db.run_sync(
+        adaptive_learning.select_next_questions_batch,
         user_id,
-        practice_mode=request.mode.value,
+        practice_mode=request.mode,
         topic_filter=request.topic_filter,
-        difficulty=request.difficulty
+        difficulty=request.difficulty,
+        n=QUEUE_BATCH_SIZE
     )
 
-    # Format question for response
-    question_data = None
-    if question:
-        # Remove 'correct' flag from answers for the user
-        answers_for_user = [
-            {"text": ans["text"]} for ans in question.answers
-        ]
-
-        question_data = {
-            "id": question.id,
-            "question_text": question.question_text,
-            "question_type": question.question_type,
-            "topic_id": question.topic_id,
-            "difficulty": question.difficulty,
-            "answers": answers_for_user,
-            "code_snippet": question.code_snippet,
-            "image_url": question.image_url,
-            "practice_context": context
-        }
+    queue = deque(format_question(question, context) for question, context in batch)
+    question_data = queue.popleft() if queue else None
+    _session_queues[session_id] = (request.mode, queue)
 
-    return {
-        "session_id": f"session_{user_id}",
+    return ORJSONResponse(content={
+        "session_id": session_id,
         "mode": request.mode,
         "question": question_data,
-    }
+    })
 
 
 @router.get("/practice/next")
 async def get_next_question(
     session_id: str,
-    mode: str = "balanced",
-    db: Session = Depends(get_db)
+    mode: str = "balanced"
 ):
     """
     Get next question in practice session.
 
-    Uses adaptive algorithm to select question based on user competencies.
+    Serves from the session's prefetched queue, topping it up with the
+    adaptive algorithm when it runs low. A queue prefetched for a
+    different mode is discarded, and the context string is rebuilt from
+    current competencies when the question is served.
 
     Args:
         session_id: Practice session identifier.
         mode: Practice mode (balanced, weak_focus, review, competition).
-        db: Database session.
 
     Returns:
         dict: Next question.
@@ -214,77 +239,102 @@ async def get_next_question(
     # TODO: Get user_id from authentication
     user_id = 1
 
-    # Select next question using adaptive algorithm
-    question, context = adaptive_learning.select_next_question(
-        db,
-        user_id,
-        practice_mode=mode
-    )
+    queued_mode, queue = _session_queues.get(session_id) or (mode, deque())
+    if queued_mode != mode:
+        # Reason: queued questions were weighted for another practice mode
+        queue = deque()
+
+    db = SessionLocal()
+
+    if len(queue) < QUEUE_REFILL_THRESHOLD:
+        batch = await db.run_sync(
+            adaptive_learning.select_next_questions_batch,
+            user_id,
+            practice_mode=mode,
+            n=QUEUE_BATCH_SIZE - len(queue),
+            exclude_ids={q["id"] for q in queue}
+        )
+        queue.extend(format_question(question, context) for question, context in batch)
+        _session_queues[session_id] = (mode, queue)
+
+    question_data = queue.popleft() if queue else None
+    if question_data:
+        question_data["practice_context"] = await db.run_sync(
+            adaptive_learning.current_practice_context,
+            user_id,
+            question_data["topic_id"],
+            mode
+        )
+
+    return ORJSONResponse(content={
+        "question": question_data,
+        "context": question_data["practice_context"] if question_data else None,
+    })
 
-    # Format question for response
-    question_data = None
-    if question:
-        # Remove 'correct' flag from answers for the user
-        answers_for_user = [
-            {"text": ans["text"]} for ans in question.answers
-        ]
-
-        question_data = {
-            "id": question.id,
-            "question_text": question.question_text,
-            "question_type": question.question_type,
-            "topic_id": question.topic_id,
-            "difficulty": question.difficulty,
-            "answers": answers_for_user,
-            "code_snippet": question.code_snippet,
-            "image_url": question.image_url,
-            "practice_context": context
-        }
 
-    return {
-        "question": question_data,
-        "context": context,
-    }
+async def _recompute_derived(user_id: int, topic_id: str) -> None:
+    """
+    Recompute metrics derived from a new attempt, after the response is sent.
+
+    Stores the topic's trend on its competency row, then drops the cached
+    dashboard so the next request reads the new trend.
 
+    Args:
+        user_id: User ID.
+        topic_id: Topic identifier.
+    """
+    db = SessionLocal()
 
-@router.post("/practice/submit")
+    await db.run_sync(trend_service.refresh_cached_trend, user_id, topic_id)
+    await db.commit()
+
+    _comp_cache.pop(user_id, None)
+
+
+@router.post("/practice/submit", response_model=api_models.AnswerSubmitResponse)
 async def submit_answer(
     request: api_models.AnswerSubmitRequest,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """
     Submit answer and get detailed explanation.
 
-    Records attempt, updates competencies, and returns explanation.
+    Records attempt, updates competencies, and returns explanation. The
+    topic trend is recomputed in the background.
 
     Args:
         request: Answer submission data.
-        db: Database session.
+        background_tasks: Tasks run after the response is sent.
 
     Returns:
         dict: Result, explanation, and competency update.
     """
     # TODO: Get user_id from authentication
     user_id = 1
+    db = SessionLocal()
 
     # Get the question
-    question = db.query(db_models.Question).filter(
-        db_models.Question.id == request.question_id
-    ).first()
+    # Reason: only fetch the columns needed to grade and explain the answer
+    question = (await db.execute(
+        select(db_models.Question).options(load_only(
+            db_models.Question.topic_id,
+            db_models.Question.answers,
+            db_models.Question.correct_answer_index,
+            db_models.Question.solution_steps,
+            db_models.Question.lesson_reference,
+        )).where(db_models.Question.id == request.question_id)
+    )).scalar_one_or_none()
 
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
 
     # Check if answer is correct
-    correct_answer_index = next(
-        (i for i, ans in enumerate(question.answers) if ans.get("correct")),
-        None
-    )
+    correct_answer_index = question.correct_answer_index
 
     is_correct = (request.selected_answer == correct_answer_index)
 
     # Record the attempt
-    attempt = db_models.QuestionAttempt(
+    await db.execute(insert(db_models.QuestionAttempt).values(
         user_id=user_id,
         question_id=question.id,
         topic_id=question.topic_id,
@@ -292,53 +342,45 @@ async def submit_answer(
         is_correct=is_correct,
         time_spent_ms=request.time_spent_ms,
         hints_used=request.hints_used
-    )
-    db.add(attempt)
+    ))
 
     # Update competency
-    updated_competency = competency_service.update_competency(
-        db,
+    updated_competency = await db.run_sync(
+        competency_service.update_competency,
         user_id,
         question.topic_id,
         is_correct,
         request.time_spent_ms
     )
 
-    # Build explanation
+    await db.commit()
+    _comp_cache.pop(user_id, None)
+    background_tasks.add_task(_recompute_derived, user_id, question.topic_id)
+
+    # Build explanation and competency update straight to JSON bytes
     user_answer = question.answers[request.selected_answer]
     correct_answer = question.answers[correct_answer_index]
 
-    explanation = {
-        "your_answer": {
-            "text": user_answer["text"],
-            "why_wrong": user_answer.get("explanation") if not is_correct else None,
-            "common_mistake": user_answer.get("common_mistake") if not is_correct else None
-        },
-        "correct_answer": {
-            "text": correct_answer["text"],
-            "why_right": correct_answer.get("explanation"),
-            "teaching_point": correct_answer.get("teaching_point")
-        },
-        "solution_steps": question.solution_steps,
-        "lesson_link": f"/lessons/{question.lesson_reference}" if question.lesson_reference else None
-    }
-
-    competency_update = {
-        "topic": question.topic_id,
-        "new_accuracy": updated_competency.accuracy,
-        "mastery_level": updated_competency.mastery_level,
-        "total_attempts": updated_competency.total_attempts
-    }
-
-    db.commit()
+    body = dump_submit_answer(
+        result="correct" if is_correct else "incorrect",
+        selected_answer=request.selected_answer,
+        correct_answer=correct_answer_index,
+        your_text=user_answer["text"],
+        why_wrong=user_answer.get("explanation") if not is_correct else None,
+        common_mistake=user_answer.get("common_mistake") if not is_correct else None,
+        correct_text=correct_answer["text"],
+        why_right=correct_answer.get("explanation"),
+        teaching_point=correct_answer.get("teaching_point"),
+        solution_steps=question.solution_steps,
+        lesson_link=f"/lessons/{question.lesson_reference}" if question.lesson_reference else None,
+        topic=question.topic_id,
+        # Reason: SQLite RETURNING can hand back REAL values as ints (1, not 1.0)
+        new_accuracy=float(updated_competency.accuracy),
+        mastery_level=updated_competency.mastery_level,
+        total_attempts=updated_competency.total_attempts,
+    )
 
-    return {
-        "result": "correct" if is_correct else "incorrect",
-        "selected_answer": request.selected_answer,
-        "correct_answer": correct_answer_index,
-        "explanation": explanation,
-        "competency_update": competency_update,
-    }
+    return Response(content=body, media_type="application/json")
 
 
 # ============================================================================
@@ -346,41 +388,36 @@ async def submit_answer(
 # ============================================================================
 
 @router.get("/preferences")
-async def get_preferences(db: Session = Depends(get_db)):
+async def get_preferences():
     """
     Get user preferences.
 
-    Args:
-        db: Database session.
-
     Returns:
         dict: User preferences.
     """
     # TODO: Implement after authentication
-    return {
+    return ORJSONResponse(content={
         "practice_mode": "balanced",
         "show_explanations": True,
         "show_hints": True,
-    }
+    })
 
 
 @router.put("/preferences")
 async def update_preferences(
-    request: api_models.PreferencesUpdateRequest,
-    db: Session = Depends(get_db)
+    request: api_models.PreferencesUpdateRequest
 ):
     """
     Update user preferences.
 
     Args:
         request: Updated preferences.
-        db: Database session.
 
     Returns:
         dict: Updated preferences.
     """
     # TODO: Implement preference updates
-    return request.model_dump()
+    return ORJSONResponse(content=request.model_dump())
 
 
 # ============================================================================
@@ -388,21 +425,18 @@ async def update_preferences(
 # ============================================================================
 
 @router.get("/progress")
-async def get_progress(db: Session = Depends(get_db)):
+async def get_progress():
     """
     Get user's learning progress.
 
     Shows completion status and scores for all levels.
 
-    Args:
-        db: Database session.
-
     Returns:
         dict: Progress data.
     """
     # TODO: Implement after authentication
-    return {
+    return ORJSONResponse(content={
         "levels": [],
         "total_points": 0,
         "badges_earned": 0,
-    }
+    })
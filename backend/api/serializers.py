@@ -0,0 +1,103 @@
+"""
+Generated JSON serializers for fixed-shape API responses.
+
+Each serializer is compiled once at import time from a key layout into a
+plain function that orjson-encodes a single dict literal, so hot endpoints
+skip response-model validation and FastAPI's encoder walk.
+"""
+
+from typing import Callable, Dict, Iterator, Union
+
+import orjson
+
+# Nested response keys mapped to serializer parameter names
+Layout = Dict[str, Union[str, "Layout"]]
+
+
+# Body of POST /practice/submit (mirrors api_models.AnswerSubmitResponse)
+SUBMIT_ANSWER_LAYOUT: Layout = {
+    "result": "result",
+    "selected_answer": "selected_answer",
+    "correct_answer": "correct_answer",
+    "explanation": {
+        "your_answer": {
+            "text": "your_text",
+            "why_wrong": "why_wrong",
+            "common_mistake": "common_mistake",
+        },
+        "correct_answer": {
+            "text": "correct_text",
+            "why_right": "why_right",
+            "teaching_point": "teaching_point",
+        },
+        "solution_steps": "solution_steps",
+        "lesson_link": "lesson_link",
+    },
+    "competency_update": {
+        "topic": "topic",
+        "new_accuracy": "new_accuracy",
+        "mastery_level": "mastery_level",
+        "total_attempts": "total_attempts",
+    },
+}
+
+
+def _parameters(layout: Layout) -> Iterator[str]:
+    """
+    Yield serializer parameter names in layout order.
+
+    Args:
+        layout: Response key layout.
+
+    Yields:
+        str: Parameter name for each leaf value.
+    """
+    for value in layout.values():
+        if isinstance(value, dict):
+            yield from _parameters(value)
+        else:
+            yield value
+
+
+def _literal(layout: Layout) -> str:
+    """
+    Render a layout as Python dict-literal source.
+
+    Args:
+        layout: Response key layout.
+
+    Returns:
+        str: Dict literal with leaves replaced by parameter names.
+    """
+    items = (
+        f"{key!r}: {_literal(value) if isinstance(value, dict) else value}"
+        for key, value in layout.items()
+    )
+    return "{" + ", ".join(items) + "}"
+
+
+def compile_serializer(name: str, layout: Layout) -> Callable[..., bytes]:
+    """
+    Generate a keyword-only function that serializes a layout to JSON bytes.
+
+    Args:
+        name: Name of the generated function.
+        layout: Response key layout; leaf values are parameter names.
+
+    Returns:
+        Callable: Function returning the encoded JSON body.
+
+    Raises:
+        ValueError: If a parameter name is not a valid identifier or repeats.
+    """
+    params = list(_parameters(layout))
+    if len(set(params)) != len(params) or not all(p.isidentifier() for p in params):
+        raise ValueError(f"Invalid serializer parameters for {name}: {params}")
+
+    source = f"def {name}(*, {', '.join(params)}):\n    return dumps({_literal(layout)})\n"
+    namespace = {"dumps": orjson.dumps}
+    exec(compile(source, f"<serializer {name}>", "exec"), namespace)
+    return namespace[name]
+
+
+dump_submit_answer = compile_serializer("dump_submit_answer", SUBMIT_ANSWER_LAYOUT)
@@ -4,9 +4,10 @@ Application configuration settings.
 Reads configuration from environment variables using pydantic-settings.
 """
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
-from typing import List
+from functools import cached_property
+from typing import Tuple
 
 
 class Settings(BaseSettings):
@@ -22,6 +23,9 @@ class Settings(BaseSettings):
     debug: bool = Field(default=False, alias="DEBUG")
     port: int = Field(default=8989, alias="PORT")
 
+    # Browser cache lifetime for frontend assets, in seconds
+    static_max_age: int = Field(default=3600, alias="STATIC_MAX_AGE")
+
     # Database
     database_url: str = Field(default="sqlite:///data/code_craze.db", alias="DATABASE_URL")
 
@@ -36,16 +40,18 @@ class Settings(BaseSettings):
         alias="ALLOWED_ORIGINS"
     )
 
-    class Config:
-        """Pydantic configuration."""
-        env_file = ".env"
-        case_sensitive = False
-        extra = "allow"
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        extra="allow",
+    )
 
-    @property
-    def cors_origins(self) -> List[str]:
-        """Get CORS origins as a list."""
-        return [origin.strip() for origin in self.allowed_origins.split(",")]
+    @cached_property
+    def cors_origins(self) -> Tuple[str, ...]:
+        """Get CORS origins as a tuple, parsed once on first access."""
+        return tuple(
+            origin.strip() for origin in self.allowed_origins.split(",") if origin.strip()
+        )
 
 
 # Global settings instance
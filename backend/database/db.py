@@ -5,11 +5,18 @@ This module handles SQLite database connection setup and session creation
 for the Code Craze application.
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Connection, create_engine, event, inspect, text
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.ext.asyncio import async_scoped_session, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from starlette.types import ASGIApp, Receive, Scope, Send
+from contextvars import ContextVar
 import os
 from pathlib import Path
+from typing import Any
+
+import orjson
 
 # Create database directory if it doesn't exist
 DB_DIR = Path(__file__).parent.parent.parent / "data"
@@ -18,44 +25,243 @@ DB_DIR.mkdir(exist_ok=True)
 # Database URL - SQLite for simplicity
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DB_DIR}/code_craze.db")
 
-# Create engine
+# Same database through the aiosqlite driver, used by request handlers
+ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+
+def _json_serializer(value: Any) -> str:
+    """
+    Serialize JSON column values with orjson.
+
+    Args:
+        value: JSON-compatible Python value.
+
+    Returns:
+        str: Encoded JSON text.
+    """
+    return orjson.dumps(value).decode()
+
+
+# Create engine for startup and scripts (init_db, seeding)
 # Reason: check_same_thread=False is needed for SQLite to work with FastAPI
 engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
+    pool_size=20,
+)
+
+# Create async engine for request handlers so DB waits don't block the event loop
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=20,
+)
+
+# SQLite tuning applied once per pooled connection
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-64000",
 )
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-# Base class for models
-Base = declarative_base()
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def _configure_sqlite(
+    dbapi_connection: DBAPIConnection,
+    connection_record: ConnectionPoolEntry
+) -> None:
+    """
+    Configure each new SQLite connection for concurrent web traffic.
 
+    WAL lets readers proceed while a writer commits, and synchronous=NORMAL
+    is durable under WAL without an fsync on every commit.
 
-def get_db():
+    Args:
+        dbapi_connection: Raw sqlite3 connection.
+        connection_record: Pool record for the connection (unused).
     """
-    Get database session for dependency injection.
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
 
-    Yields:
-        Session: SQLAlchemy database session.
+
+# Create session factory for scripts
+SyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Identifies the current request; each distinct value gets its own session
+_session_scope: ContextVar[object] = ContextVar("session_scope", default=None)
+
+# Create request-scoped async session registry
+SessionLocal = async_scoped_session(
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False),
+    scopefunc=_session_scope.get,
+)
+
+
+class Base(DeclarativeBase):
+    """Base class for models."""
+
+
+class DBSessionMiddleware:
+    """
+    ASGI middleware that scopes SessionLocal to a single HTTP request.
+
+    Handlers use SessionLocal directly instead of a per-request
+    dependency; the session is created lazily on first use and removed
+    when the response completes. The request boundary owns the
+    transaction: services only flush, the handler commits once on
+    success, and anything left uncommitted (e.g. after an exception) is
+    rolled back when the session is removed.
 
     Example:
         @app.get("/users/")
-        def read_users(db: Session = Depends(get_db)):
-            return db.query(User).all()
+        async def read_users():
+            db = SessionLocal()
+            return (await db.scalars(select(User))).all()
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
+    def __init__(self, app: ASGIApp) -> None:
+        """
+        Wrap an ASGI application.
+
+        Args:
+            app: Downstream ASGI application.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handle an ASGI call inside a fresh session scope.
+
+        Args:
+            scope: ASGI connection scope.
+            receive: ASGI receive callable.
+            send: ASGI send callable.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = _session_scope.set(object())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await SessionLocal.remove()
+            _session_scope.reset(token)
 
-def init_db():
+
+def init_db() -> None:
     """
     Initialize database by creating all tables.
 
-    This should be called once at application startup.
+    This should be called once at application startup. Every worker
+    process runs it, so table creation and column migrations happen under
+    SQLite's write lock: the first worker upgrades the schema and the
+    others wait, then find nothing left to do.
     """
     from backend.database.models import User, UserCompetency, QuestionAttempt, UserPreference, Question, Badge, UserBadge, Progress
 
-    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        # Reason: BEGIN IMMEDIATE takes the write lock before the schema is
+        # read, so concurrent workers can't both decide a column is missing
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        Base.metadata.create_all(bind=conn)
+        migrate_db(conn)
+        conn.commit()
+
+
+# Columns added after the initial schema:
+# (table, column, DDL, backfill SQL, (invalid-rows SQL, problem) or None)
+COLUMN_MIGRATIONS = (
+    (
+        "questions",
+        "correct_answer_index",
+        "ALTER TABLE questions ADD COLUMN correct_answer_index INTEGER NOT NULL DEFAULT 0",
+        "UPDATE questions SET correct_answer_index = ("
+        "SELECT CAST(key AS INTEGER) FROM json_each(questions.answers) "
+        "WHERE json_extract(value, '$.correct') = 1 LIMIT 1)",
+        # Same rule as seed_data.get_correct_answer_index: never guess an answer
+        (
+            "SELECT id FROM questions WHERE NOT EXISTS ("
+            "SELECT 1 FROM json_each(questions.answers) "
+            "WHERE json_extract(value, '$.correct') = 1)",
+            "no answer marked correct",
+        ),
+    ),
+    (
+        "user_competencies",
+        "accuracy",
+        "ALTER TABLE user_competencies ADD COLUMN accuracy FLOAT DEFAULT 0.0",
+        "UPDATE user_competencies SET accuracy = CASE WHEN total_attempts > 0 "
+        "THEN CAST(correct_attempts AS FLOAT) / total_attempts ELSE 0.0 END",
+        None,
+    ),
+    (
+        "user_competencies",
+        "avg_time_ms",
+        "ALTER TABLE user_competencies ADD COLUMN avg_time_ms FLOAT DEFAULT 0.0",
+        "UPDATE user_competencies SET avg_time_ms = CASE WHEN total_attempts > 0 "
+        "THEN CAST(total_time_ms AS FLOAT) / total_attempts ELSE 0.0 END",
+        None,
+    ),
+    (
+        "user_competencies",
+        "cached_trend",
+        "ALTER TABLE user_competencies ADD COLUMN cached_trend VARCHAR(20)",
+        # NULL means not yet computed; readers fall back to a live calculation
+        None,
+        None,
+    ),
+)
+
+
+def migrate_db(conn: Connection) -> None:
+    """
+    Apply in-place schema upgrades to an existing database.
+
+    create_all() only creates missing tables, so columns and indexes added
+    after a database was first created are added (and backfilled) here.
+    The caller holds the write lock and commits.
+
+    Args:
+        conn: Connection inside a BEGIN IMMEDIATE transaction.
+
+    Raises:
+        RuntimeError: If existing rows can't be backfilled for a new column.
+    """
+    # Reason: read the schema inside the locked transaction, not before it
+    inspector = inspect(conn)
+    existing = {
+        table: {col["name"] for col in inspector.get_columns(table)}
+        for table in {migration[0] for migration in COLUMN_MIGRATIONS}
+    }
+
+    for table, column, ddl, backfill, check in COLUMN_MIGRATIONS:
+        if column in existing[table]:
+            continue
+
+        if check:
+            invalid_sql, problem = check
+            invalid_ids = conn.execute(text(invalid_sql)).scalars().all()
+            if invalid_ids:
+                raise RuntimeError(
+                    f"Cannot add {table}.{column}: rows with id "
+                    f"{', '.join(map(str, invalid_ids))} have {problem}"
+                )
+
+        conn.execute(text(ddl))
+        if backfill:
+            conn.execute(text(backfill))
+
+    # Equivalent to CREATE INDEX IF NOT EXISTS for every declared index
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
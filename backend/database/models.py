@@ -5,8 +5,12 @@ This module defines all database tables including users, competency tracking,
 questions, and gamification elements.
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Text, JSON
-from sqlalchemy.orm import relationship
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import String, Float, DateTime, ForeignKey, Text, JSON, Index
+from sqlalchemy import select, literal_column
+from sqlalchemy.orm import Mapped, mapped_column, relationship, column_property, deferred
 from sqlalchemy.sql import func
 from backend.database.db import Base
 
@@ -16,21 +20,21 @@ class User(Base):
 
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
-    username = Column(String(50), unique=True, index=True, nullable=False)
-    email = Column(String(100), unique=True, index=True, nullable=False)
-    hashed_password = Column(String(200), nullable=False)
-    full_name = Column(String(100))
-    is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    username: Mapped[str] = mapped_column(String(50), unique=True, index=True)
+    email: Mapped[str] = mapped_column(String(100), unique=True, index=True)
+    hashed_password: Mapped[str] = mapped_column(String(200))
+    full_name: Mapped[Optional[str]] = mapped_column(String(100))
+    is_active: Mapped[Optional[bool]] = mapped_column(default=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    competencies = relationship("UserCompetency", back_populates="user", cascade="all, delete-orphan")
-    question_attempts = relationship("QuestionAttempt", back_populates="user", cascade="all, delete-orphan")
-    preferences = relationship("UserPreference", back_populates="user", uselist=False, cascade="all, delete-orphan")
-    badges = relationship("UserBadge", back_populates="user", cascade="all, delete-orphan")
-    progress = relationship("Progress", back_populates="user", cascade="all, delete-orphan")
+    competencies: Mapped[List["UserCompetency"]] = relationship("UserCompetency", back_populates="user", cascade="all, delete-orphan")
+    question_attempts: Mapped[List["QuestionAttempt"]] = relationship("QuestionAttempt", back_populates="user", cascade="all, delete-orphan")
+    preferences: Mapped[Optional["UserPreference"]] = relationship("UserPreference", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    badges: Mapped[List["UserBadge"]] = relationship("UserBadge", back_populates="user", cascade="all, delete-orphan")
+    progress: Mapped[List["Progress"]] = relationship("Progress", back_populates="user", cascade="all, delete-orphan")
 
 
 class UserCompetency(Base):
@@ -41,34 +45,29 @@ class UserCompetency(Base):
     """
 
     __tablename__ = "user_competencies"
-
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    topic_id = Column(String(50), nullable=False, index=True)  # e.g., "1.1_karel_commands"
-    total_attempts = Column(Integer, default=0)
-    correct_attempts = Column(Integer, default=0)
-    total_time_ms = Column(Integer, default=0)  # Total time spent on this topic
-    last_practiced = Column(DateTime(timezone=True))
-    mastery_level = Column(String(20), default="novice")  # novice, developing, proficient, expert, master
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    __table_args__ = (
+        Index("ix_uc_user_topic", "user_id", "topic_id", unique=True),
+        Index("ix_uc_user_last_practiced", "user_id", "last_practiced"),
+        # Serves weak-area filters and accuracy ordering within a user
+        Index("ix_uc_user_accuracy", "user_id", "accuracy"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    topic_id: Mapped[str] = mapped_column(String(50), index=True)  # e.g., "1.1_karel_commands"
+    total_attempts: Mapped[Optional[int]] = mapped_column(default=0)
+    correct_attempts: Mapped[Optional[int]] = mapped_column(default=0)
+    total_time_ms: Mapped[Optional[int]] = mapped_column(default=0)  # Total time spent on this topic
+    accuracy: Mapped[Optional[float]] = mapped_column(Float, default=0.0)  # correct_attempts / total_attempts
+    avg_time_ms: Mapped[Optional[float]] = mapped_column(Float, default=0.0)  # total_time_ms / total_attempts
+    last_practiced: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    mastery_level: Mapped[Optional[str]] = mapped_column(String(20), default="novice")  # novice, developing, proficient, expert, master
+    cached_trend: Mapped[Optional[str]] = mapped_column(String(20))  # improving, stable, declining; NULL until first computed
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="competencies")
-
-    @property
-    def accuracy(self) -> float:
-        """Calculate accuracy percentage."""
-        if self.total_attempts == 0:
-            return 0.0
-        return self.correct_attempts / self.total_attempts
-
-    @property
-    def avg_time_ms(self) -> float:
-        """Calculate average time per attempt in milliseconds."""
-        if self.total_attempts == 0:
-            return 0.0
-        return self.total_time_ms / self.total_attempts
+    user: Mapped["User"] = relationship("User", back_populates="competencies")
 
 
 class QuestionAttempt(Base):
@@ -79,21 +78,25 @@ class QuestionAttempt(Base):
     """
 
     __tablename__ = "question_attempts"
-
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
-    topic_id = Column(String(50), nullable=False, index=True)
-    selected_answer = Column(Integer)  # Index of selected answer
-    is_correct = Column(Boolean, nullable=False)
-    time_spent_ms = Column(Integer)  # Time to answer in milliseconds
-    hints_used = Column(Integer, default=0)
-    attempt_number = Column(Integer, default=1)  # For same question retries
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        Index("ix_qa_user_created", "user_id", "created_at"),
+        Index("ix_qa_user_topic_created", "user_id", "topic_id", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"))
+    topic_id: Mapped[str] = mapped_column(String(50), index=True)
+    selected_answer: Mapped[Optional[int]] = mapped_column()  # Index of selected answer
+    is_correct: Mapped[bool] = mapped_column()
+    time_spent_ms: Mapped[Optional[int]] = mapped_column()  # Time to answer in milliseconds
+    hints_used: Mapped[Optional[int]] = mapped_column(default=0)
+    attempt_number: Mapped[Optional[int]] = mapped_column(default=1)  # For same question retries
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="question_attempts")
-    question = relationship("Question", back_populates="attempts")
+    user: Mapped["User"] = relationship("User", back_populates="question_attempts")
+    question: Mapped["Question"] = relationship("Question", back_populates="attempts")
 
 
 class UserPreference(Base):
@@ -103,19 +106,19 @@ class UserPreference(Base):
 
     __tablename__ = "user_preferences"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
-    practice_mode = Column(String(20), default="balanced")  # balanced, weak_focus, review, competition
-    show_explanations = Column(Boolean, default=True)
-    show_hints = Column(Boolean, default=True)
-    difficulty_level = Column(String(20), default="adaptive")  # adaptive, easy, medium, hard
-    theme = Column(String(20), default="light")  # light, dark
-    sound_enabled = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), unique=True)
+    practice_mode: Mapped[Optional[str]] = mapped_column(String(20), default="balanced")  # balanced, weak_focus, review, competition
+    show_explanations: Mapped[Optional[bool]] = mapped_column(default=True)
+    show_hints: Mapped[Optional[bool]] = mapped_column(default=True)
+    difficulty_level: Mapped[Optional[str]] = mapped_column(String(20), default="adaptive")  # adaptive, easy, medium, hard
+    theme: Mapped[Optional[str]] = mapped_column(String(20), default="light")  # light, dark
+    sound_enabled: Mapped[Optional[bool]] = mapped_column(default=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="preferences")
+    user: Mapped["User"] = relationship("User", back_populates="preferences")
 
 
 class Question(Base):
@@ -126,29 +129,53 @@ class Question(Base):
     """
 
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_topic_difficulty", "topic_id", "difficulty"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
-    question_text = Column(Text, nullable=False)
-    question_type = Column(String(20), nullable=False)  # multiple_choice, code_trace, code_completion, matching
-    topic_id = Column(String(50), nullable=False, index=True)
-    difficulty = Column(Integer, default=1)  # 1-5 scale
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    question_text: Mapped[str] = mapped_column(Text)
+    question_type: Mapped[str] = mapped_column(String(20))  # multiple_choice, code_trace, code_completion, matching
+    topic_id: Mapped[str] = mapped_column(String(50), index=True)
+    difficulty: Mapped[Optional[int]] = mapped_column(default=1)  # 1-5 scale
 
     # JSON fields for structured data
     # answers: [{"text": "...", "correct": bool, "explanation": "...", "common_mistake": "..."}]
-    answers = Column(JSON, nullable=False)
+    answers: Mapped[List[Dict[str, Any]]] = mapped_column(JSON)
+
+    # Index into answers of the correct option, precomputed at load time
+    correct_answer_index: Mapped[int] = mapped_column()
+
+    # answers reduced to [{"text": ...}] by SQLite, hiding the correct flag;
+    # deferred so it is only computed when requested via load_only().
+    # Reason: json_group_array has no ORDER BY before SQLite 3.44, so it
+    # aggregates a subquery sorted by array index to keep answer positions
+    user_answers: Mapped[List[Dict[str, str]]] = deferred(column_property(
+        select(func.json_group_array(
+            func.json_object("text", func.json_extract(literal_column("value"), "$.text")),
+            type_=JSON,
+        ))
+        .select_from(
+            select(literal_column("key"), literal_column("value"))
+            .select_from(func.json_each(answers))
+            .order_by(literal_column("key"))
+            .subquery()
+        )
+        .scalar_subquery()
+    ))
 
     # solution_steps: ["Step 1: ...", "Step 2: ...", ...]
-    solution_steps = Column(JSON)
+    solution_steps: Mapped[Optional[List[str]]] = mapped_column(JSON)
 
     # Optional code snippet for code-related questions
-    code_snippet = Column(Text)
+    code_snippet: Mapped[Optional[str]] = mapped_column(Text)
 
-    lesson_reference = Column(String(50))  # Link to lesson
-    image_url = Column(String(200))  # Optional diagram/image
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    lesson_reference: Mapped[Optional[str]] = mapped_column(String(50))  # Link to lesson
+    image_url: Mapped[Optional[str]] = mapped_column(String(200))  # Optional diagram/image
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    attempts = relationship("QuestionAttempt", back_populates="question")
+    attempts: Mapped[List["QuestionAttempt"]] = relationship("QuestionAttempt", back_populates="question")
 
 
 class Badge(Base):
@@ -158,17 +185,17 @@ class Badge(Base):
 
     __tablename__ = "badges"
 
-    id = Column(Integer, primary_key=True, index=True)
-    badge_id = Column(String(50), unique=True, nullable=False)  # e.g., "python_master"
-    name = Column(String(100), nullable=False)
-    description = Column(Text)
-    icon = Column(String(50))  # Emoji or icon identifier
-    category = Column(String(30))  # topic_mastery, achievement, collection
-    criteria = Column(JSON)  # Criteria for earning (e.g., {"accuracy": 0.95, "topic": "4"})
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    badge_id: Mapped[str] = mapped_column(String(50), unique=True)  # e.g., "python_master"
+    name: Mapped[str] = mapped_column(String(100))
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    icon: Mapped[Optional[str]] = mapped_column(String(50))  # Emoji or icon identifier
+    category: Mapped[Optional[str]] = mapped_column(String(30))  # topic_mastery, achievement, collection
+    criteria: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON)  # Criteria for earning (e.g., {"accuracy": 0.95, "topic": "4"})
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    user_badges = relationship("UserBadge", back_populates="badge")
+    user_badges: Mapped[List["UserBadge"]] = relationship("UserBadge", back_populates="badge")
 
 
 class UserBadge(Base):
@@ -178,14 +205,14 @@ class UserBadge(Base):
 
     __tablename__ = "user_badges"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    badge_id = Column(Integer, ForeignKey("badges.id"), nullable=False)
-    earned_at = Column(DateTime(timezone=True), server_default=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    badge_id: Mapped[int] = mapped_column(ForeignKey("badges.id"))
+    earned_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="badges")
-    badge = relationship("Badge", back_populates="user_badges")
+    user: Mapped["User"] = relationship("User", back_populates="badges")
+    badge: Mapped["Badge"] = relationship("Badge", back_populates="user_badges")
 
 
 class Progress(Base):
@@ -195,15 +222,15 @@ class Progress(Base):
 
     __tablename__ = "progress"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    level = Column(Integer, nullable=False)  # 0-10
-    status = Column(String(20), default="locked")  # locked, in_progress, completed
-    score = Column(Float)  # Quiz score (0-100)
-    time_spent_ms = Column(Integer, default=0)
-    completed_at = Column(DateTime(timezone=True))
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    level: Mapped[int] = mapped_column()  # 0-10
+    status: Mapped[Optional[str]] = mapped_column(String(20), default="locked")  # locked, in_progress, completed
+    score: Mapped[Optional[float]] = mapped_column(Float)  # Quiz score (0-100)
+    time_spent_ms: Mapped[Optional[int]] = mapped_column(default=0)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="progress")
+    user: Mapped["User"] = relationship("User", back_populates="progress")
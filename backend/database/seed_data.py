@@ -5,13 +5,39 @@ This script loads sample questions from JSON and creates a test user
 for trying out the application.
 """
 
-import json
+from itertools import islice
 from pathlib import Path
+from typing import Dict, List
+
+import ijson
+from sqlalchemy import delete, insert
 from sqlalchemy.orm import Session
 
-from backend.database.db import SessionLocal, init_db
+from backend.database.db import SyncSessionLocal, init_db
 from backend.database.models import User, Question, UserPreference, Badge
 
+# Questions parsed and inserted per executemany batch
+SEED_BATCH_SIZE = 1000
+
+
+def get_correct_answer_index(answers: List[Dict]) -> int:
+    """
+    Find the index of the correct answer in a question's answer list.
+
+    Args:
+        answers: Answer objects, exactly one of which has "correct": true.
+
+    Returns:
+        int: Index of the correct answer.
+
+    Raises:
+        ValueError: If no answer is marked correct.
+    """
+    for index, answer in enumerate(answers):
+        if answer.get("correct"):
+            return index
+    raise ValueError("Question has no answer marked correct")
+
 
 def load_sample_questions(db: Session):
     """
@@ -27,37 +53,34 @@ def load_sample_questions(db: Session):
         print(f"❌ Sample questions file not found: {questions_file}")
         return
 
-    # Load JSON
-    with open(questions_file, 'r') as f:
-        data = json.load(f)
-
     # Clear existing questions
-    db.query(Question).delete()
-
-    # Add questions
-    for q_data in data.get("questions", []):
-        question = Question(
-            id=q_data["id"],
-            question_text=q_data["question_text"],
-            question_type=q_data["question_type"],
-            topic_id=q_data["topic_id"],
-            difficulty=q_data["difficulty"],
-            answers=q_data["answers"],
-            solution_steps=q_data.get("solution_steps"),
-            code_snippet=q_data.get("code_snippet"),
-            lesson_reference=q_data.get("lesson_reference"),
-            image_url=q_data.get("image_url")
-        )
-        db.add(question)
+    db.execute(delete(Question))
+
+    # Stream questions from the file and insert them in fixed-size batches
+    loaded = 0
+    with open(questions_file, "rb") as f:
+        questions = ijson.items(f, "questions.item", use_float=True)
+        while batch := list(islice(questions, SEED_BATCH_SIZE)):
+            # Normalize optional keys so every row binds the same parameters
+            for row in batch:
+                for key in ("solution_steps", "code_snippet", "lesson_reference", "image_url"):
+                    row.setdefault(key, None)
+                row["correct_answer_index"] = get_correct_answer_index(row["answers"])
+
+            # Reason: one executemany INSERT instead of a unit-of-work flush per row
+            db.execute(insert(Question), batch)
+            loaded += len(batch)
 
-    db.commit()
-    print(f"✅ Loaded {len(data.get('questions', []))} sample questions")
+    print(f"✅ Loaded {loaded} sample questions")
 
 
 def create_test_user(db: Session):
     """
     Create a test user for trying the application.
 
+    The user and their preferences are written together; the caller
+    commits.
+
     Args:
         db: Database session.
     """
@@ -67,27 +90,29 @@ def create_test_user(db: Session):
         print("ℹ️  Test user 'student' already exists")
         return existing
 
-    # Create test user (password hashing will be implemented with auth system)
-    user = User(
-        username="student",
-        email="student@codecraze.test",
-        hashed_password="password123",  # Placeholder - will be hashed when auth is implemented
-        full_name="Test Student",
-        is_active=True
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-
-    # Create default preferences
-    preferences = UserPreference(
-        user_id=user.id,
-        practice_mode="balanced",
-        show_explanations=True,
-        show_hints=True
-    )
-    db.add(preferences)
-    db.commit()
+    # Reason: the savepoint makes user + preferences one atomic unit; a
+    # failure rolls back both without ending the caller's transaction
+    with db.begin_nested():
+        # Create test user (password hashing will be implemented with auth system)
+        user = User(
+            username="student",
+            email="student@codecraze.test",
+            hashed_password="password123",  # Placeholder - will be hashed when auth is implemented
+            full_name="Test Student",
+            is_active=True
+        )
+        db.add(user)
+        # Reason: flush assigns user.id without committing
+        db.flush()
+
+        # Create default preferences
+        preferences = UserPreference(
+            user_id=user.id,
+            practice_mode="balanced",
+            show_explanations=True,
+            show_hints=True
+        )
+        db.add(preferences)
 
     print(f"✅ Created test user: username='student', password='password123'")
     return user
@@ -101,7 +126,7 @@ def create_sample_badges(db: Session):
         db: Database session.
     """
     # Clear existing badges
-    db.query(Badge).delete()
+    db.execute(delete(Badge))
 
     badges = [
         {
@@ -170,11 +195,7 @@ def create_sample_badges(db: Session):
         }
     ]
 
-    for badge_data in badges:
-        badge = Badge(**badge_data)
-        db.add(badge)
-
-    db.commit()
+    db.execute(insert(Badge), badges)
     print(f"✅ Created {len(badges)} sample badges")
 
 
@@ -189,17 +210,19 @@ def seed_database():
     print("✅ Database initialized\n")
 
     # Create session
-    db = SessionLocal()
+    db = SyncSessionLocal()
 
     try:
-        # Load sample questions
-        load_sample_questions(db)
+        # Seed everything in one transaction; commits on success
+        with db.begin():
+            # Load sample questions
+            load_sample_questions(db)
 
-        # Create test user
-        create_test_user(db)
+            # Create test user
+            create_test_user(db)
 
-        # Create sample badges
-        create_sample_badges(db)
+            # Create sample badges
+            create_sample_badges(db)
 
         print("\n✅ Database seeding complete!")
         print("\n📝 You can now log in with:")
@@ -209,7 +232,6 @@ def seed_database():
 
     except Exception as e:
         print(f"\n❌ Error seeding database: {e}")
-        db.rollback()
         raise
     finally:
         db.close()
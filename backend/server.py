@@ -7,12 +7,50 @@ This is the entry point for the backend API server running on port 8989.
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.responses import Response
+from starlette.types import Scope
 from contextlib import asynccontextmanager
+import os
 import uvicorn
 
 from backend.config.settings import settings
-from backend.database.db import init_db
+from backend.database.db import init_db, DBSessionMiddleware
 from backend.api import routes
+from backend.api.responses import ORJSONResponse
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that lets browsers cache frontend assets.
+
+    Starlette already sends a weak-comparable ETag (from mtime and size)
+    and answers matching If-None-Match requests with 304 without reading
+    the file; this adds a Cache-Control header so fresh assets are not
+    re-requested at all.
+    """
+
+    def file_response(
+        self,
+        full_path: "os.PathLike[str]",
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        """
+        Build the file (or 304) response with caching headers.
+
+        Args:
+            full_path: Resolved path of the requested file.
+            stat_result: Result of stat() on the file.
+            scope: ASGI connection scope.
+            status_code: Status code for the file response.
+
+        Returns:
+            Response: File response or 304 Not Modified.
+        """
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Cache-Control"] = f"public, max-age={settings.static_max_age}"
+        return response
 
 
 @asynccontextmanager
@@ -40,6 +78,7 @@ app = FastAPI(
     version=settings.app_version,
     description="Interactive study guide for Science Olympiad Code Craze event",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -51,13 +90,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Scope a database session to each request
+app.add_middleware(DBSessionMiddleware)
+
 # Include API routes
 app.include_router(routes.router, prefix="/api")
 
-# Mount static files (frontend)
-app.mount("/", StaticFiles(directory="frontend", html=True), name="frontend")
-
-
 @app.get("/health")
 async def health_check():
     """
@@ -66,12 +104,16 @@ async def health_check():
     Returns:
         dict: Health status and application info.
     """
-    return {
+    return ORJSONResponse(content={
         "status": "healthy",
         "app": settings.app_name,
         "version": settings.app_version,
         "port": settings.port,
-    }
+    })
+
+
+# Mount static files (frontend) last so API routes and /health match first
+app.mount("/", CachedStaticFiles(directory="frontend", html=True), name="frontend")
 
 
 def main():
@@ -85,12 +127,21 @@ def main():
     print(f"🔗 Open http://localhost:{settings.port} in your browser")
     print(f"📚 API docs available at http://localhost:{settings.port}/docs")
 
+    # Reason: reload mode only supports a single worker process
+    workers = 1 if settings.debug else (os.cpu_count() or 2)
+
+    # loop/http "auto" resolve to uvloop and httptools (installed by
+    # uvicorn[standard]) and fall back to asyncio/h11 where unavailable
     uvicorn.run(
         "backend.server:app",
         host="0.0.0.0",
         port=settings.port,
         reload=settings.debug,
+        workers=workers,
+        loop="auto",
+        http="auto",
         log_level="info",
+        access_log=settings.debug,
     )
 
 
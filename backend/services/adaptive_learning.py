@@ -5,82 +5,173 @@ Implements algorithms to select optimal questions based on user competency
 and practice mode.
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional, Dict, Tuple
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import RowMapping, Select, case, func, select
+from typing import Optional, Dict, List, Sequence, Tuple, Union
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate
 import random
 
-from backend.database.models import Question, UserCompetency, QuestionAttempt
-from backend.services.competency_service import get_user_competencies, get_weak_areas
+from backend.database.models import Question, QuestionAttempt, UserCompetency
+from backend.services.competency_service import (
+    get_topic_info, WEAK_MIN_ATTEMPTS, WEAK_ACCURACY_THRESHOLD
+)
 
+# Columns needed to present a question; solution data is loaded on submit
+QUESTION_DISPLAY_COLUMNS = load_only(
+    Question.question_text,
+    Question.question_type,
+    Question.topic_id,
+    Question.difficulty,
+    Question.user_answers,
+    Question.code_snippet,
+    Question.image_url,
+)
 
-def select_next_question(
+
+def select_next_questions_batch(
     db: Session,
     user_id: int,
     practice_mode: str = "balanced",
     topic_filter: Optional[list] = None,
     difficulty: Optional[int] = None,
+    n: int = 10,
+    exclude_ids: Optional[set] = None,
     exclude_recent: int = 10
-) -> Tuple[Optional[Question], str]:
+) -> List[Tuple[Question, str]]:
     """
-    Select next question using adaptive algorithm.
+    Select a batch of questions using the adaptive algorithm.
+
+    Draws n topics from the mode's topic weights, then samples each
+    topic's quota from the matching question IDs.
 
     Args:
         db: Database session.
         user_id: User ID.
         practice_mode: Mode (balanced, weak_focus, review, competition).
-        topic_filter: Optional list of topic IDs to filter by.
+        topic_filter: Optional list of topic IDs for the fallback pick.
         difficulty: Optional difficulty (1-5), None = adaptive.
+        n: Number of questions to select.
+        exclude_ids: Optional question IDs to skip (e.g., already queued).
         exclude_recent: Exclude recently answered questions.
 
     Returns:
-        tuple: (Question object, context string explaining selection)
+        list: (Question object, context string) pairs in serving order.
     """
-    # Get topic weights based on practice mode
-    topic_weights = calculate_topic_weights(db, user_id, practice_mode)
+    if n <= 0:
+        return []
+
+    exclude_ids = set(exclude_ids or ())
+    recent_question_ids = recent_question_ids_query(user_id, exclude_recent)
+    topic_weights, competencies = calculate_topic_weights(db, user_id, practice_mode)
 
     if not topic_weights:
-        # No competency data yet, select random question
-        question = select_random_question(db, topic_filter, difficulty)
-        return question, "Starting your learning journey!"
+        # No competency data yet, select random questions
+        questions = select_random_questions(
+            db, topic_filter, difficulty, exclude_ids, n, recent_question_ids
+        )
+        return [(q, "Starting your learning journey!") for q in questions]
+
+    # Number of questions wanted from each topic
+    topic_counts = Counter(weighted_random_choice(topic_weights) for _ in range(n))
+
+    # Candidate IDs per topic; only the sampled questions are loaded
+    query = select(Question.id, Question.topic_id).where(Question.topic_id.in_(topic_counts))
+    if difficulty:
+        query = query.where(Question.difficulty == difficulty)
+    query = exclude_questions(query, exclude_ids, recent_question_ids)
+
+    candidates: Dict[str, List[int]] = {}
+    for question_id, topic_id in db.execute(query):
+        candidates.setdefault(topic_id, []).append(question_id)
+
+    selected_ids = []
+    for topic_id, ids in candidates.items():
+        selected_ids += random.sample(ids, min(topic_counts[topic_id], len(ids)))
+
+    questions = load_questions(db, selected_ids)
+
+    if len(questions) < n:
+        # Fallback to any available questions
+        exclude_ids |= {q.id for q in questions}
+        questions += select_random_questions(
+            db, topic_filter, difficulty, exclude_ids, n - len(questions), recent_question_ids
+        )
+
+    random.shuffle(questions)
+
+    # Generate context strings
+    competencies = {c["topic_id"]: c for c in competencies}
+
+    return [
+        (q, practice_context(competencies.get(q.topic_id), practice_mode))
+        for q in questions
+    ]
+
+
+def practice_context(topic_comp: Optional[Dict], practice_mode: str) -> str:
+    """
+    Build the context string shown alongside a selected question.
+
+    Args:
+        topic_comp: Competency row for the question's topic, if any.
+        practice_mode: Mode (balanced, weak_focus, review, competition).
 
-    # Select topic based on weighted probability
-    selected_topic = weighted_random_choice(topic_weights)
+    Returns:
+        str: Context string explaining the selection.
+    """
+    if not topic_comp:
+        return "Exploring new topics"
 
-    # Get recently answered question IDs to avoid
-    recent_question_ids = get_recent_question_ids(db, user_id, exclude_recent)
+    topic_name = get_topic_info(topic_comp["topic_id"]).get("name", topic_comp["topic_id"])
+    if practice_mode == "weak_focus":
+        return f"Practicing: {topic_name} (Your accuracy: {topic_comp['accuracy']:.0%})"
+    return f"Practicing: {topic_name}"
 
-    # Select question from topic
-    question = select_question_from_topic(
-        db,
-        selected_topic,
-        difficulty,
-        recent_question_ids
-    )
 
-    if not question:
-        # Fallback to any available question
-        question = select_random_question(db, topic_filter, difficulty, recent_question_ids)
+def current_practice_context(
+    db: Session,
+    user_id: int,
+    topic_id: str,
+    practice_mode: str
+) -> str:
+    """
+    Build a question's context string from the user's current competencies.
+
+    Used when a prefetched question is served, so the accuracy shown is
+    the one at serving time rather than when the batch was selected.
 
-    # Generate context string
-    competencies = get_user_competencies(db, user_id)
-    topic_comp = next((c for c in competencies if c["topic_id"] == selected_topic), None)
+    Args:
+        db: Database session.
+        user_id: User ID.
+        topic_id: Topic of the question being served.
+        practice_mode: Mode (balanced, weak_focus, review, competition).
 
-    if topic_comp and practice_mode == "weak_focus":
-        context = f"Practicing: {topic_comp['topic_name']} (Your accuracy: {topic_comp['accuracy']:.0%})"
-    elif topic_comp:
-        context = f"Practicing: {topic_comp['topic_name']}"
-    else:
-        context = "Exploring new topics"
+    Returns:
+        str: Context string explaining the selection.
+    """
+    topics_started, accuracy = db.execute(
+        select(
+            func.count(),
+            func.max(case((UserCompetency.topic_id == topic_id, UserCompetency.accuracy))),
+        ).where(UserCompetency.user_id == user_id)
+    ).one()
 
-    return question, context
+    if not topics_started:
+        return "Starting your learning journey!"
+
+    if accuracy is None:
+        return practice_context(None, practice_mode)
+
+    return practice_context({"topic_id": topic_id, "accuracy": accuracy}, practice_mode)
 
 
 def calculate_topic_weights(
     db: Session,
     user_id: int,
     practice_mode: str
-) -> Dict[str, float]:
+) -> Tuple[Dict[str, float], Sequence[RowMapping]]:
     """
     Calculate topic weights based on practice mode.
 
@@ -90,12 +181,22 @@ def calculate_topic_weights(
         practice_mode: Mode (balanced, weak_focus, review, competition).
 
     Returns:
-        dict: Topic ID -> weight mapping.
+        tuple: (topic ID -> weight mapping, competency rows the weights
+            were computed from, for reuse in context strings)
     """
-    competencies = get_user_competencies(db, user_id)
+    # Reason: only the columns the weights need, as plain rows (no trends,
+    # topic info or ORM identity map)
+    competencies = db.execute(
+        select(
+            UserCompetency.topic_id,
+            UserCompetency.accuracy,
+            UserCompetency.total_attempts,
+            UserCompetency.last_practiced,
+        ).where(UserCompetency.user_id == user_id).order_by(UserCompetency.accuracy)
+    ).mappings().all()
 
     if not competencies:
-        return {}
+        return {}, competencies
 
     weights = {}
 
@@ -106,8 +207,8 @@ def calculate_topic_weights(
             attempts = comp["total_attempts"]
 
             # Only focus on topics with enough attempts
-            if attempts >= 5:
-                if accuracy < 0.70:
+            if attempts >= WEAK_MIN_ATTEMPTS:
+                if accuracy < WEAK_ACCURACY_THRESHOLD:
                     # High weight for struggling topics
                     weight = (1.0 - accuracy) * 2.0
                 elif accuracy < 0.85:
@@ -144,14 +245,11 @@ def calculate_topic_weights(
 
     else:  # balanced mode
         # Mix of current level (50%), review (30%), weak areas (20%)
-        weak_areas = get_weak_areas(db, user_id)
-        weak_topic_ids = {area["topic_id"] for area in weak_areas}
-
         for comp in competencies:
             topic_id = comp["topic_id"]
             attempts = comp["total_attempts"]
 
-            if topic_id in weak_topic_ids:
+            if attempts >= WEAK_MIN_ATTEMPTS and comp["accuracy"] < WEAK_ACCURACY_THRESHOLD:
                 # Weak areas get higher weight
                 weight = 1.5
             elif attempts > 0 and comp["accuracy"] > 0.85:
@@ -163,7 +261,7 @@ def calculate_topic_weights(
 
             weights[topic_id] = weight
 
-    return weights
+    return weights, competencies
 
 
 def weighted_random_choice(weights: Dict[str, float]) -> str:
@@ -179,181 +277,111 @@ def weighted_random_choice(weights: Dict[str, float]) -> str:
     if not weights:
         raise ValueError("Weights dictionary is empty")
 
-    items = list(weights.keys())
-    weight_values = list(weights.values())
+    items = tuple(weights)
+    cumulative = list(accumulate(weights.values()))
+    total = cumulative[-1]
 
     # Handle all zero weights
-    if all(w == 0 for w in weight_values):
+    if total <= 0:
         return random.choice(items)
 
-    return random.choices(items, weights=weight_values, k=1)[0]
+    # Reason: bisect_right skips zero-weight items sharing a cumulative value
+    return items[bisect_right(cumulative, random.random() * total)]
 
 
-def get_recent_question_ids(
-    db: Session,
-    user_id: int,
-    count: int
-) -> set:
+def recent_question_ids_query(user_id: int, count: int) -> Select:
     """
-    Get recently answered question IDs.
+    Build a subquery of recently answered question IDs.
+
+    Used as ``~Question.id.in_(...)`` so the exclusion is planned as part
+    of the selecting statement instead of a separate round trip.
 
     Args:
-        db: Database session.
         user_id: User ID.
         count: Number of recent questions.
 
     Returns:
-        set: Set of recent question IDs.
+        Select: SELECT of the user's most recent question IDs.
     """
-    recent = db.query(QuestionAttempt.question_id).filter(
+    return select(QuestionAttempt.question_id).where(
         QuestionAttempt.user_id == user_id
-    ).order_by(QuestionAttempt.created_at.desc()).limit(count).all()
+    ).order_by(QuestionAttempt.created_at.desc()).limit(count)
 
-    return {q[0] for q in recent}
 
-
-def select_question_from_topic(
-    db: Session,
-    topic_id: str,
-    difficulty: Optional[int],
-    exclude_ids: set
-) -> Optional[Question]:
+def exclude_questions(query: Select, *exclusions: Union[set, Select, None]) -> Select:
     """
-    Select a question from a specific topic.
+    Filter out questions whose ID appears in any of the given exclusions.
 
     Args:
-        db: Database session.
-        topic_id: Topic identifier.
-        difficulty: Optional difficulty level.
-        exclude_ids: Set of question IDs to exclude.
+        query: Select over Question columns.
+        *exclusions: Sets of question IDs or selects of question IDs;
+            None and empty sets are skipped.
 
     Returns:
-        Question: Selected question or None.
+        Select: The select with the exclusion filters applied.
     """
-    query = db.query(Question).filter(Question.topic_id == topic_id)
-
-    if difficulty:
-        query = query.filter(Question.difficulty == difficulty)
-
-    if exclude_ids:
-        query = query.filter(~Question.id.in_(exclude_ids))
-
-    # Get all matching questions
-    questions = query.all()
-
-    if not questions:
-        return None
+    for ids in exclusions:
+        if isinstance(ids, Select) or ids:
+            query = query.where(~Question.id.in_(ids))
 
-    # Select random question from matches
-    return random.choice(questions)
+    return query
 
 
-def select_random_question(
+def select_random_questions(
     db: Session,
     topic_filter: Optional[list],
     difficulty: Optional[int],
-    exclude_ids: Optional[set] = None
-) -> Optional[Question]:
+    exclude_ids: Union[set, Select, None],
+    count: int,
+    recent_ids: Optional[Select] = None
+) -> List[Question]:
     """
-    Select a random question (fallback method).
+    Select several random questions (batch fallback method).
 
     Args:
         db: Database session.
         topic_filter: Optional topic filter.
         difficulty: Optional difficulty filter.
-        exclude_ids: Optional set of IDs to exclude.
+        exclude_ids: Optional set or select of IDs to exclude.
+        count: Maximum number of questions to return.
+        recent_ids: Optional select of recently answered IDs to exclude.
 
     Returns:
-        Question: Random question or None.
+        list: Random questions, possibly fewer than count.
     """
-    query = db.query(Question)
+    query = select(Question.id)
 
     if topic_filter:
-        query = query.filter(Question.topic_id.in_(topic_filter))
+        query = query.where(Question.topic_id.in_(topic_filter))
 
     if difficulty:
-        query = query.filter(Question.difficulty == difficulty)
+        query = query.where(Question.difficulty == difficulty)
 
-    if exclude_ids:
-        query = query.filter(~Question.id.in_(exclude_ids))
+    query = exclude_questions(query, exclude_ids, recent_ids)
 
-    # Random selection using SQL
-    question = query.order_by(func.random()).first()
+    # Reason: sampling IDs avoids ORDER BY RANDOM() sorting every full row
+    ids = db.scalars(query).all()
 
-    return question
+    return load_questions(db, random.sample(ids, min(count, len(ids))))
 
 
-def adapt_difficulty(
-    db: Session,
-    user_id: int,
-    topic_id: str
-) -> int:
-    """
-    Suggest difficulty level based on user performance.
-
-    Args:
-        db: Database session.
-        user_id: User ID.
-        topic_id: Topic identifier.
-
-    Returns:
-        int: Suggested difficulty (1-5).
-    """
-    comp = db.query(UserCompetency).filter(
-        UserCompetency.user_id == user_id,
-        UserCompetency.topic_id == topic_id
-    ).first()
-
-    if not comp or comp.total_attempts < 5:
-        # Start with easy questions
-        return 2
-
-    accuracy = comp.accuracy
-
-    # Adjust difficulty based on accuracy
-    if accuracy >= 0.90:
-        return 5  # Hard
-    elif accuracy >= 0.80:
-        return 4  # Medium-hard
-    elif accuracy >= 0.70:
-        return 3  # Medium
-    elif accuracy >= 0.60:
-        return 2  # Easy-medium
-    else:
-        return 1  # Easy
-
-
-def should_show_hint(
-    db: Session,
-    user_id: int,
-    topic_id: str,
-    time_spent_ms: int
-) -> bool:
+def load_questions(db: Session, question_ids: List[int]) -> List[Question]:
     """
-    Determine if a hint should be offered.
-
-    Based on user performance and time spent.
+    Load questions for display by ID.
 
     Args:
         db: Database session.
-        user_id: User ID.
-        topic_id: Topic identifier.
-        time_spent_ms: Time already spent on question.
+        question_ids: Question IDs to load.
 
     Returns:
-        bool: True if hint should be offered.
+        list: Questions in the order of question_ids.
     """
-    comp = db.query(UserCompetency).filter(
-        UserCompetency.user_id == user_id,
-        UserCompetency.topic_id == topic_id
-    ).first()
-
-    # Offer hint if struggling (low accuracy and taking long time)
-    if comp and comp.accuracy < 0.60 and time_spent_ms > 60000:  # 1 minute
-        return True
+    if not question_ids:
+        return []
 
-    # Offer hint if taking very long time regardless
-    if time_spent_ms > 180000:  # 3 minutes
-        return True
+    questions = db.query(Question).options(QUESTION_DISPLAY_COLUMNS).filter(
+        Question.id.in_(question_ids)
+    ).all()
+    by_id = {q.id: q for q in questions}
 
-    return False
+    return [by_id[question_id] for question_id in question_ids if question_id in by_id]
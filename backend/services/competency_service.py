@@ -5,370 +5,209 @@ Tracks user performance across topics and calculates mastery levels.
 """
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import Case, ColumnElement, Float, and_, case, cast
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+import os
+import pickle
+import tempfile
 import yaml
 from pathlib import Path
 
-from backend.database.models import UserCompetency, QuestionAttempt, User
+from backend.database.models import UserCompetency, User
 
 
-# Load topic taxonomy
-TOPICS_FILE = Path(__file__).parent.parent.parent / "content" / "config" / "topics.yaml"
-try:
-    with open(TOPICS_FILE, "r") as f:
-        TOPICS_CONFIG = yaml.safe_load(f)
-except FileNotFoundError:
-    TOPICS_CONFIG = {"topics": [], "mastery_levels": {}}
+# Prefer the libyaml-backed loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
-def get_or_create_competency(
-    db: Session,
-    user_id: int,
-    topic_id: str
-) -> UserCompetency:
+def load_topics_config(topics_file: Path) -> Dict:
     """
-    Get existing competency or create new one.
+    Load the topic taxonomy, using a pickle cache next to the YAML file.
+
+    The cache is reused while it is newer than the YAML file, so reloads
+    skip YAML parsing; otherwise the YAML is parsed and the cache rewritten.
 
     Args:
-        db: Database session.
-        user_id: User ID.
-        topic_id: Topic identifier.
+        topics_file: Path to topics.yaml.
 
     Returns:
-        UserCompetency: Competency record.
+        dict: Parsed taxonomy, or an empty one if the file is missing.
     """
-    competency = db.query(UserCompetency).filter(
-        UserCompetency.user_id == user_id,
-        UserCompetency.topic_id == topic_id
-    ).first()
+    cache_file = topics_file.with_suffix(".pkl")
 
-    if not competency:
-        competency = UserCompetency(
-            user_id=user_id,
-            topic_id=topic_id,
-            mastery_level="novice"
-        )
-        db.add(competency)
-        db.commit()
-        db.refresh(competency)
+    try:
+        yaml_mtime = topics_file.stat().st_mtime
+    except FileNotFoundError:
+        return {"topics": [], "mastery_levels": {}}
 
-    return competency
+    try:
+        if cache_file.stat().st_mtime > yaml_mtime:
+            with open(cache_file, "rb") as f:
+                return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
 
+    with open(topics_file, "r") as f:
+        config = yaml.load(f, Loader=YAML_LOADER)
 
-def update_competency(
-    db: Session,
-    user_id: int,
-    topic_id: str,
-    is_correct: bool,
-    time_spent_ms: int
-) -> UserCompetency:
-    """
-    Update competency after a question attempt.
+    # Reason: write a temp file and rename it over the cache, so a worker
+    # starting concurrently never reads a half-written pickle
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(config, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_file)
+    except OSError:
+        # Reason: a read-only checkout still works, just without the cache
+        if tmp_path:
+            Path(tmp_path).unlink(missing_ok=True)
 
-    Calculates new accuracy and mastery level.
+    return config
 
-    Args:
-        db: Database session.
-        user_id: User ID.
-        topic_id: Topic identifier.
-        is_correct: Whether answer was correct.
-        time_spent_ms: Time spent on question in milliseconds.
-
-    Returns:
-        UserCompetency: Updated competency record.
-    """
-    competency = get_or_create_competency(db, user_id, topic_id)
 
-    # Update statistics
-    competency.total_attempts += 1
-    if is_correct:
-        competency.correct_attempts += 1
-    competency.total_time_ms += time_spent_ms
-    competency.last_practiced = datetime.utcnow()
-
-    # Calculate new mastery level
-    accuracy = competency.accuracy
-    attempts = competency.total_attempts
-
-    mastery_levels = TOPICS_CONFIG.get("mastery_levels", {})
-
-    # Determine mastery level based on accuracy and attempts
-    new_mastery = "novice"
-    for level_name in ["master", "expert", "proficient", "developing", "novice"]:
-        level_criteria = mastery_levels.get(level_name, {})
-        min_accuracy = level_criteria.get("min_accuracy", 0.0)
-        min_attempts = level_criteria.get("min_attempts", 0)
-
-        if accuracy >= min_accuracy and attempts >= min_attempts:
-            new_mastery = level_name
-            break
+# Load topic taxonomy
+TOPICS_FILE = Path(__file__).parent.parent.parent / "content" / "config" / "topics.yaml"
+TOPICS_CONFIG = load_topics_config(TOPICS_FILE)
 
-    competency.mastery_level = new_mastery
-    competency.updated_at = datetime.utcnow()
+# Main topics and subtopics keyed by ID for O(1) lookup
+_TOPIC_INDEX: Dict[str, Dict] = {}
+for _topic in TOPICS_CONFIG.get("topics", []):
+    _TOPIC_INDEX[_topic["id"]] = _topic
+    for _subtopic in _topic.get("subtopics", []):
+        _TOPIC_INDEX[_subtopic["id"]] = _subtopic
 
-    db.commit()
-    db.refresh(competency)
 
-    return competency
+# (min_accuracy, min_attempts, name) for each configured level, highest first
+_MASTERY_TIERS: List[Tuple[float, int, str]] = sorted(
+    (
+        (criteria.get("min_accuracy", 0.0), criteria.get("min_attempts", 0), level_name)
+        for level_name, criteria in TOPICS_CONFIG.get("mastery_levels", {}).items()
+    ),
+    reverse=True,
+)
 
 
-def get_user_competencies(
-    db: Session,
-    user_id: int
-) -> List[Dict]:
+def calculate_mastery_level(accuracy: float, attempts: int) -> str:
     """
-    Get all competencies for a user.
+    Determine mastery level from accuracy and attempt count.
 
     Args:
-        db: Database session.
-        user_id: User ID.
+        accuracy: Fraction of attempts answered correctly.
+        attempts: Total number of attempts.
 
     Returns:
-        list: List of competency dictionaries with topic info.
+        str: Highest mastery level whose thresholds are met.
     """
-    competencies = db.query(UserCompetency).filter(
-        UserCompetency.user_id == user_id
-    ).all()
-
-    result = []
-    for comp in competencies:
-        topic_info = get_topic_info(comp.topic_id)
-        trend = calculate_trend(db, user_id, comp.topic_id)
-
-        result.append({
-            "topic_id": comp.topic_id,
-            "topic_name": topic_info.get("name", comp.topic_id),
-            "mastery_level": comp.mastery_level,
-            "accuracy": comp.accuracy,
-            "total_attempts": comp.total_attempts,
-            "avg_time_ms": comp.avg_time_ms,
-            "last_practiced": comp.last_practiced,
-            "trend": trend,
-        })
+    for min_accuracy, min_attempts, level_name in _MASTERY_TIERS:
+        if accuracy >= min_accuracy and attempts >= min_attempts:
+            return level_name
 
-    return result
+    return "novice"
 
 
-def get_topic_info(topic_id: str) -> Dict:
+def mastery_level_expression(
+    accuracy: ColumnElement[float],
+    total_attempts: ColumnElement[int]
+) -> Case[str]:
     """
-    Get topic information from taxonomy.
+    Build a SQL CASE expression equivalent to calculate_mastery_level.
 
     Args:
-        topic_id: Topic identifier (e.g., "2.1").
+        accuracy: SQL expression for accuracy (0.0-1.0).
+        total_attempts: SQL expression for total attempt count.
 
     Returns:
-        dict: Topic information including name and description.
-    """
-    # Parse topic ID (e.g., "2.1" -> main=2, sub=1)
-    parts = topic_id.split(".")
-    if len(parts) == 1:
-        main_id = parts[0]
-        sub_id = None
-    else:
-        main_id = parts[0]
-        sub_id = ".".join(parts)
-
-    # Search for topic in config
-    for topic in TOPICS_CONFIG.get("topics", []):
-        if topic["id"] == main_id:
-            if sub_id:
-                # Look for subtopic
-                for subtopic in topic.get("subtopics", []):
-                    if subtopic["id"] == sub_id:
-                        return subtopic
-                return {"name": sub_id, "description": ""}
-            else:
-                return topic
-
-    return {"name": topic_id, "description": ""}
-
-
-def calculate_trend(
+        Case: SQL expression yielding the mastery level name.
+    """
+    return case(
+        *(
+            (and_(accuracy >= min_accuracy, total_attempts >= min_attempts), level_name)
+            for min_accuracy, min_attempts, level_name in _MASTERY_TIERS
+        ),
+        else_="novice"
+    )
+
+
+def update_competency(
     db: Session,
     user_id: int,
     topic_id: str,
-    lookback_attempts: int = 10
-) -> str:
+    is_correct: bool,
+    time_spent_ms: int
+) -> UserCompetency:
     """
-    Calculate performance trend for a topic.
+    Update competency after a question attempt.
 
-    Compares recent performance to earlier performance.
+    Creates or updates the competency row with a single
+    INSERT ... ON CONFLICT DO UPDATE, recalculating the mastery level in
+    the same statement. The caller owns the transaction and must commit.
 
     Args:
         db: Database session.
         user_id: User ID.
         topic_id: Topic identifier.
-        lookback_attempts: Number of recent attempts to consider.
+        is_correct: Whether answer was correct.
+        time_spent_ms: Time spent on question in milliseconds.
 
     Returns:
-        str: "improving", "stable", or "declining".
-    """
-    # Get recent attempts for this topic
-    attempts = db.query(QuestionAttempt).filter(
-        QuestionAttempt.user_id == user_id,
-        QuestionAttempt.topic_id == topic_id
-    ).order_by(QuestionAttempt.created_at.desc()).limit(lookback_attempts * 2).all()
-
-    if len(attempts) < lookback_attempts:
-        return "stable"
-
-    # Split into recent and earlier
-    recent = attempts[:lookback_attempts]
-    earlier = attempts[lookback_attempts:lookback_attempts * 2]
-
-    # Calculate accuracy for each
-    recent_accuracy = sum(1 for a in recent if a.is_correct) / len(recent)
-    earlier_accuracy = sum(1 for a in earlier if a.is_correct) / len(earlier)
-
-    # Determine trend
-    diff = recent_accuracy - earlier_accuracy
-    if diff > 0.1:
-        return "improving"
-    elif diff < -0.1:
-        return "declining"
-    else:
-        return "stable"
-
-
-def get_weak_areas(
-    db: Session,
-    user_id: int,
-    min_attempts: int = 5,
-    accuracy_threshold: float = 0.70
-) -> List[Dict]:
+        UserCompetency: Updated competency record.
     """
-    Identify weak areas that need more practice.
+    now = datetime.utcnow()
+    correct = int(is_correct)
+
+    stmt = sqlite_insert(UserCompetency).values(
+        user_id=user_id,
+        topic_id=topic_id,
+        total_attempts=1,
+        correct_attempts=correct,
+        total_time_ms=time_spent_ms,
+        accuracy=float(correct),
+        avg_time_ms=float(time_spent_ms),
+        last_practiced=now,
+        mastery_level=calculate_mastery_level(float(correct), 1),
+    )
+    new_total = UserCompetency.total_attempts + 1
+    new_correct = UserCompetency.correct_attempts + stmt.excluded.correct_attempts
+    new_time = UserCompetency.total_time_ms + stmt.excluded.total_time_ms
+    new_accuracy = cast(new_correct, Float) / new_total
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "topic_id"],
+        set_={
+            "total_attempts": new_total,
+            "correct_attempts": new_correct,
+            "total_time_ms": new_time,
+            "accuracy": new_accuracy,
+            "avg_time_ms": cast(new_time, Float) / new_total,
+            "last_practiced": stmt.excluded.last_practiced,
+            "mastery_level": mastery_level_expression(new_accuracy, new_total),
+            "updated_at": stmt.excluded.last_practiced,
+        },
+    ).returning(UserCompetency)
+
+    return db.scalars(
+        stmt, execution_options={"populate_existing": True}
+    ).one()
 
-    Args:
-        db: Database session.
-        user_id: User ID.
-        min_attempts: Minimum attempts before considering a topic.
-        accuracy_threshold: Topics below this accuracy are considered weak.
 
-    Returns:
-        list: List of weak topics with recommendations.
-    """
-    competencies = db.query(UserCompetency).filter(
-        UserCompetency.user_id == user_id,
-        UserCompetency.total_attempts >= min_attempts
-    ).all()
-
-    weak_areas = []
-    for comp in competencies:
-        if comp.accuracy < accuracy_threshold:
-            topic_info = get_topic_info(comp.topic_id)
-            weak_areas.append({
-                "topic_id": comp.topic_id,
-                "topic_name": topic_info.get("name", comp.topic_id),
-                "accuracy": comp.accuracy,
-                "total_attempts": comp.total_attempts,
-                "mastery_level": comp.mastery_level,
-                "reason": f"Current accuracy ({comp.accuracy:.1%}) is below target ({accuracy_threshold:.1%})",
-            })
-
-    # Sort by accuracy (weakest first)
-    weak_areas.sort(key=lambda x: x["accuracy"])
-
-    return weak_areas
-
-
-def calculate_competition_readiness(
-    db: Session,
-    user_id: int
-) -> Tuple[int, Dict]:
+def get_topic_info(topic_id: str) -> Dict:
     """
-    Calculate overall competition readiness score (0-100).
+    Get topic information from taxonomy.
 
     Args:
-        db: Database session.
-        user_id: User ID.
+        topic_id: Topic identifier (e.g., "2.1").
 
     Returns:
-        tuple: (readiness_score, breakdown_dict)
+        dict: Topic information including name and description.
     """
-    competencies = get_user_competencies(db, user_id)
-
-    if not competencies:
-        return 0, {
-            "coverage": 0,
-            "accuracy": 0,
-            "mastery": 0,
-            "total": 0,
-        }
-
-    # Calculate metrics
-    total_topics = len(TOPICS_CONFIG.get("topics", []))
-    topics_started = len(competencies)
-    coverage_score = (topics_started / total_topics) * 100 if total_topics > 0 else 0
-
-    avg_accuracy = sum(c["accuracy"] for c in competencies) / len(competencies)
-    accuracy_score = avg_accuracy * 100
-
-    mastery_weights = {"novice": 0, "developing": 0.5, "proficient": 0.75, "expert": 0.9, "master": 1.0}
-    avg_mastery = sum(mastery_weights.get(c["mastery_level"], 0) for c in competencies) / len(competencies)
-    mastery_score = avg_mastery * 100
-
-    # Overall score (weighted average)
-    overall_score = int(
-        coverage_score * 0.3 +
-        accuracy_score * 0.4 +
-        mastery_score * 0.3
-    )
-
-    breakdown = {
-        "coverage": int(coverage_score),
-        "accuracy": int(accuracy_score),
-        "mastery": int(mastery_score),
-        "total": overall_score,
-    }
+    return _TOPIC_INDEX.get(topic_id, {"name": topic_id, "description": ""})
 
-    return overall_score, breakdown
 
+# A topic is weak once it has this many attempts and accuracy below the threshold
+WEAK_MIN_ATTEMPTS = 5
+WEAK_ACCURACY_THRESHOLD = 0.70
 
-def get_recommendations(
-    db: Session,
-    user_id: int,
-    max_recommendations: int = 3
-) -> List[str]:
-    """
-    Get personalized learning recommendations.
-
-    Args:
-        db: Database session.
-        user_id: User ID.
-        max_recommendations: Maximum number of recommendations.
-
-    Returns:
-        list: List of recommendation strings.
-    """
-    recommendations = []
-
-    # Check for weak areas
-    weak_areas = get_weak_areas(db, user_id)
-    if weak_areas:
-        for weak in weak_areas[:max_recommendations]:
-            recommendations.append(
-                f"Focus on {weak['topic_name']} (current accuracy: {weak['accuracy']:.1%})"
-            )
-
-    # Check for topics not practiced recently
-    competencies = db.query(UserCompetency).filter(
-        UserCompetency.user_id == user_id,
-        UserCompetency.last_practiced < datetime.utcnow() - timedelta(days=3)
-    ).order_by(UserCompetency.last_practiced).limit(max_recommendations).all()
-
-    for comp in competencies:
-        if len(recommendations) < max_recommendations:
-            topic_info = get_topic_info(comp.topic_id)
-            days_ago = (datetime.utcnow() - comp.last_practiced).days
-            recommendations.append(
-                f"Review {topic_info.get('name', comp.topic_id)} (last practiced {days_ago} days ago)"
-            )
-
-    # If no specific recommendations, suggest next level
-    if not recommendations:
-        recommendations.append("Continue practicing to maintain your skills!")
-
-    return recommendations[:max_recommendations]
+# Contribution of each mastery level to the readiness mastery score
+MASTERY_WEIGHTS = {"novice": 0, "developing": 0.5, "proficient": 0.75, "expert": 0.9, "master": 1.0}
@@ -0,0 +1,292 @@
+"""
+Competency dashboard service.
+
+Builds the full /competencies dashboard from a single SQL statement: the
+user's competency rows with their stored trends, the readiness aggregate
+and the ranked weak/stale recommendation rows.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import Integer, Row, and_, case, cast, func, literal, select, true, union_all
+from typing import Dict, List, Tuple
+from datetime import datetime, timedelta
+
+from backend.database.models import QuestionAttempt, UserCompetency
+from backend.services.competency_service import (
+    MASTERY_WEIGHTS,
+    TOPICS_CONFIG,
+    WEAK_ACCURACY_THRESHOLD,
+    WEAK_MIN_ATTEMPTS,
+    get_topic_info,
+)
+from backend.services.trend_service import classify_trend
+
+# Topics not practiced for this long are recommended for review
+STALE_AFTER = timedelta(days=3)
+
+
+def get_dashboard(
+    db: Session,
+    user_id: int,
+    lookback_attempts: int = 10,
+    max_recommendations: int = 3
+) -> Dict:
+    """
+    Get the user's competency dashboard in one query.
+
+    Trends are read from UserCompetency.cached_trend; attempt statistics
+    are only windowed for topics that have never had one stored.
+
+    Args:
+        db: Database session.
+        user_id: User ID.
+        lookback_attempts: Attempts per window when calculating missing trends.
+        max_recommendations: Maximum number of recommendations.
+
+    Returns:
+        dict: overall_progress, competition_readiness, competencies and
+            recommendations.
+    """
+    now = datetime.utcnow()
+
+    comps = select(
+        UserCompetency.topic_id,
+        UserCompetency.mastery_level,
+        UserCompetency.accuracy,
+        UserCompetency.total_attempts,
+        UserCompetency.avg_time_ms,
+        UserCompetency.last_practiced,
+        UserCompetency.cached_trend,
+    ).where(UserCompetency.user_id == user_id).cte("comps")
+
+    readiness = select(
+        func.count().label("topics_started"),
+        func.avg(comps.c.accuracy).label("avg_accuracy"),
+        func.avg(case(MASTERY_WEIGHTS, value=comps.c.mastery_level, else_=0)).label("avg_mastery"),
+    ).cte("readiness")
+
+    # Number attempts newest first, only for topics without a stored trend
+    ranked = select(
+        QuestionAttempt.topic_id,
+        cast(QuestionAttempt.is_correct, Integer).label("correct"),
+        func.row_number().over(
+            partition_by=QuestionAttempt.topic_id,
+            order_by=QuestionAttempt.created_at.desc(),
+        ).label("rank"),
+    ).where(
+        QuestionAttempt.user_id == user_id,
+        QuestionAttempt.topic_id.in_(
+            select(comps.c.topic_id).where(comps.c.cached_trend.is_(None))
+        ),
+    ).cte("ranked")
+
+    # Per-topic counts for the recent and earlier lookback windows
+    is_recent = ranked.c.rank <= lookback_attempts
+    trend_stats = select(
+        ranked.c.topic_id,
+        func.sum(case((is_recent, 1), else_=0)).label("recent_count"),
+        func.sum(case((is_recent, ranked.c.correct), else_=0)).label("recent_correct"),
+        func.sum(case((is_recent, 0), else_=1)).label("earlier_count"),
+        func.sum(case((is_recent, 0), else_=ranked.c.correct)).label("earlier_correct"),
+    ).where(
+        ranked.c.rank <= lookback_attempts * 2
+    ).group_by(ranked.c.topic_id).cte("trend_stats")
+
+    # Weak topics (weakest first), then stale topics (oldest first)
+    recs = union_all(
+        select(
+            comps.c.topic_id, literal(0).label("priority"), comps.c.accuracy.label("sort_key")
+        ).where(
+            comps.c.total_attempts >= WEAK_MIN_ATTEMPTS,
+            comps.c.accuracy < WEAK_ACCURACY_THRESHOLD
+        ),
+        select(
+            comps.c.topic_id, literal(1).label("priority"),
+            func.julianday(comps.c.last_practiced).label("sort_key")
+        ).where(comps.c.last_practiced < now - STALE_AFTER),
+    ).cte("recs")
+    ranked_recs = select(
+        recs.c.topic_id,
+        recs.c.priority,
+        func.row_number().over(
+            order_by=(recs.c.priority, recs.c.sort_key, recs.c.topic_id)
+        ).label("rec_rank"),
+    ).cte("ranked_recs")
+    weak_rec = ranked_recs.alias("weak_rec")
+    stale_rec = ranked_recs.alias("stale_rec")
+
+    # Reason: selecting from the one-row readiness CTE keeps a row when the
+    # user has no competencies yet
+    rows = db.execute(
+        select(
+            readiness.c.topics_started,
+            readiness.c.avg_accuracy,
+            readiness.c.avg_mastery,
+            comps.c.topic_id,
+            comps.c.mastery_level,
+            comps.c.accuracy,
+            comps.c.total_attempts,
+            comps.c.avg_time_ms,
+            comps.c.last_practiced,
+            comps.c.cached_trend,
+            trend_stats.c.recent_count,
+            trend_stats.c.recent_correct,
+            trend_stats.c.earlier_count,
+            trend_stats.c.earlier_correct,
+            weak_rec.c.rec_rank.label("weak_rank"),
+            stale_rec.c.rec_rank.label("stale_rank"),
+        )
+        .select_from(readiness)
+        .outerjoin(comps, true())
+        .outerjoin(trend_stats, trend_stats.c.topic_id == comps.c.topic_id)
+        .outerjoin(weak_rec, and_(
+            weak_rec.c.topic_id == comps.c.topic_id,
+            weak_rec.c.priority == 0,
+            weak_rec.c.rec_rank <= max_recommendations,
+        ))
+        .outerjoin(stale_rec, and_(
+            stale_rec.c.topic_id == comps.c.topic_id,
+            stale_rec.c.priority == 1,
+            stale_rec.c.rec_rank <= max_recommendations,
+        ))
+        .order_by(comps.c.accuracy, comps.c.topic_id)
+    ).all()
+
+    competencies = []
+    ranked_recommendations: List[Tuple[int, str]] = []
+    for row in rows:
+        if row.topic_id is None:
+            continue
+
+        topic_name = get_topic_info(row.topic_id).get("name", row.topic_id)
+        competencies.append({
+            "topic_id": row.topic_id,
+            "topic_name": topic_name,
+            "mastery_level": row.mastery_level,
+            "accuracy": row.accuracy,
+            "total_attempts": row.total_attempts,
+            "avg_time_ms": row.avg_time_ms,
+            "last_practiced": row.last_practiced,
+            "trend": row.cached_trend or _trend(row, lookback_attempts),
+        })
+
+        if row.weak_rank is not None:
+            ranked_recommendations.append((
+                row.weak_rank,
+                f"Focus on {topic_name} (current accuracy: {row.accuracy:.1%})"
+            ))
+        if row.stale_rank is not None:
+            days_ago = (now - row.last_practiced).days
+            ranked_recommendations.append((
+                row.stale_rank,
+                f"Review {topic_name} (last practiced {days_ago} days ago)"
+            ))
+
+    recommendations = [text for _, text in sorted(ranked_recommendations)]
+
+    # If no specific recommendations, suggest next level
+    if not recommendations:
+        recommendations.append("Continue practicing to maintain your skills!")
+
+    readiness_score, breakdown = _score_readiness(
+        rows[0].topics_started, rows[0].avg_accuracy or 0.0, rows[0].avg_mastery or 0.0
+    )
+
+    return {
+        "overall_progress": breakdown.get("total", 0),
+        "competition_readiness": readiness_score,
+        "competencies": competencies,
+        "recommendations": recommendations,
+    }
+
+
+def _trend(row: Row, lookback_attempts: int) -> str:
+    """
+    Classify a topic's trend from its windowed attempt counts.
+
+    Args:
+        row: Dashboard row carrying the trend_stats columns.
+        lookback_attempts: Attempts per window.
+
+    Returns:
+        str: "improving", "stable", or "declining".
+    """
+    recent_count = row.recent_count or 0
+    earlier_count = row.earlier_count or 0
+
+    if recent_count + earlier_count < lookback_attempts:
+        return "stable"
+
+    return classify_trend(
+        row.recent_correct, recent_count, row.earlier_correct, earlier_count
+    )
+
+
+def _score_readiness(
+    topics_started: int,
+    avg_accuracy: float,
+    avg_mastery: float
+) -> Tuple[int, Dict]:
+    """
+    Calculate overall competition readiness score (0-100).
+
+    Args:
+        topics_started: Number of topics with a competency record.
+        avg_accuracy: Mean accuracy across those topics (0.0-1.0).
+        avg_mastery: Mean MASTERY_WEIGHTS value across those topics.
+
+    Returns:
+        tuple: (readiness_score, breakdown_dict)
+    """
+    if not topics_started:
+        return 0, {
+            "coverage": 0,
+            "accuracy": 0,
+            "mastery": 0,
+            "total": 0,
+        }
+
+    # Calculate metrics
+    total_topics = len(TOPICS_CONFIG.get("topics", []))
+    coverage_score = (topics_started / total_topics) * 100 if total_topics > 0 else 0
+    accuracy_score = avg_accuracy * 100
+    mastery_score = avg_mastery * 100
+
+    # Overall score (weighted average)
+    overall_score = int(
+        coverage_score * 0.3 +
+        accuracy_score * 0.4 +
+        mastery_score * 0.3
+    )
+
+    breakdown = {
+        "coverage": int(coverage_score),
+        "accuracy": int(accuracy_score),
+        "mastery": int(mastery_score),
+        "total": overall_score,
+    }
+
+    return overall_score, breakdown
+
+
+def dashboard_version(db: Session, user_id: int) -> Tuple:
+    """
+    Get a cheap fingerprint of the state a dashboard is built from.
+
+    Changes whenever an attempt is recorded or a stored trend is
+    refreshed, so a cached dashboard can be checked against the database
+    by any worker process.
+
+    Args:
+        db: Database session.
+        user_id: User ID.
+
+    Returns:
+        tuple: (total attempts, latest competency update time).
+    """
+    return tuple(db.execute(
+        select(
+            func.sum(UserCompetency.total_attempts),
+            func.max(UserCompetency.updated_at),
+        ).where(UserCompetency.user_id == user_id)
+    ).one())
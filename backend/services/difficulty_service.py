@@ -0,0 +1,85 @@
+"""
+Difficulty and hint service.
+
+Adjusts question difficulty and hint offers to a user's topic competency.
+"""
+
+from sqlalchemy.orm import Session
+
+from backend.database.models import UserCompetency
+
+
+def adapt_difficulty(
+    db: Session,
+    user_id: int,
+    topic_id: str
+) -> int:
+    """
+    Suggest difficulty level based on user performance.
+
+    Args:
+        db: Database session.
+        user_id: User ID.
+        topic_id: Topic identifier.
+
+    Returns:
+        int: Suggested difficulty (1-5).
+    """
+    comp = db.query(UserCompetency).filter(
+        UserCompetency.user_id == user_id,
+        UserCompetency.topic_id == topic_id
+    ).first()
+
+    if not comp or comp.total_attempts < 5:
+        # Start with easy questions
+        return 2
+
+    accuracy = comp.accuracy
+
+    # Adjust difficulty based on accuracy
+    if accuracy >= 0.90:
+        return 5  # Hard
+    elif accuracy >= 0.80:
+        return 4  # Medium-hard
+    elif accuracy >= 0.70:
+        return 3  # Medium
+    elif accuracy >= 0.60:
+        return 2  # Easy-medium
+    else:
+        return 1  # Easy
+
+
+def should_show_hint(
+    db: Session,
+    user_id: int,
+    topic_id: str,
+    time_spent_ms: int
+) -> bool:
+    """
+    Determine if a hint should be offered.
+
+    Based on user performance and time spent.
+
+    Args:
+        db: Database session.
+        user_id: User ID.
+        topic_id: Topic identifier.
+        time_spent_ms: Time already spent on question.
+
+    Returns:
+        bool: True if hint should be offered.
+    """
+    comp = db.query(UserCompetency).filter(
+        UserCompetency.user_id == user_id,
+        UserCompetency.topic_id == topic_id
+    ).first()
+
+    # Offer hint if struggling (low accuracy and taking long time)
+    if comp and comp.accuracy < 0.60 and time_spent_ms > 60000:  # 1 minute
+        return True
+
+    # Offer hint if taking very long time regardless
+    if time_spent_ms > 180000:  # 3 minutes
+        return True
+
+    return False
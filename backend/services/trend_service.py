@@ -0,0 +1,115 @@
+"""
+Performance trend service.
+
+Compares a user's recent accuracy on a topic with their earlier accuracy.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import update
+from datetime import datetime
+
+from backend.database.models import QuestionAttempt, UserCompetency
+
+
+def calculate_trend(
+    db: Session,
+    user_id: int,
+    topic_id: str,
+    lookback_attempts: int = 10
+) -> str:
+    """
+    Calculate performance trend for a topic.
+
+    Compares recent performance to earlier performance.
+
+    Args:
+        db: Database session.
+        user_id: User ID.
+        topic_id: Topic identifier.
+        lookback_attempts: Number of recent attempts to consider.
+
+    Returns:
+        str: "improving", "stable", or "declining".
+    """
+    # Get recent attempts for this topic
+    attempts = db.query(QuestionAttempt).filter(
+        QuestionAttempt.user_id == user_id,
+        QuestionAttempt.topic_id == topic_id
+    ).order_by(QuestionAttempt.created_at.desc()).limit(lookback_attempts * 2).all()
+
+    if len(attempts) < lookback_attempts:
+        return "stable"
+
+    # Split into recent and earlier
+    recent = attempts[:lookback_attempts]
+    earlier = attempts[lookback_attempts:lookback_attempts * 2]
+
+    return classify_trend(
+        sum(1 for a in recent if a.is_correct), len(recent),
+        sum(1 for a in earlier if a.is_correct), len(earlier)
+    )
+
+
+def refresh_cached_trend(
+    db: Session,
+    user_id: int,
+    topic_id: str,
+    lookback_attempts: int = 10
+) -> str:
+    """
+    Recalculate a topic's trend and store it on the competency row.
+
+    Readers use UserCompetency.cached_trend instead of querying attempts.
+    The caller owns the transaction and must commit.
+
+    Args:
+        db: Database session.
+        user_id: User ID.
+        topic_id: Topic identifier.
+        lookback_attempts: Number of recent attempts to consider.
+
+    Returns:
+        str: "improving", "stable", or "declining".
+    """
+    trend = calculate_trend(db, user_id, topic_id, lookback_attempts)
+
+    # Reason: explicit timestamp so dashboard_version sees the refresh;
+    # onupdate=func.now() only has one-second resolution in SQLite
+    db.execute(
+        update(UserCompetency)
+        .where(UserCompetency.user_id == user_id, UserCompetency.topic_id == topic_id)
+        .values(cached_trend=trend, updated_at=datetime.utcnow())
+    )
+
+    return trend
+
+
+def classify_trend(
+    recent_correct: int,
+    recent_count: int,
+    earlier_correct: int,
+    earlier_count: int
+) -> str:
+    """
+    Classify a trend by comparing recent and earlier accuracy.
+
+    Args:
+        recent_correct: Correct answers among the recent attempts.
+        recent_count: Number of recent attempts.
+        earlier_correct: Correct answers among the earlier attempts.
+        earlier_count: Number of earlier attempts.
+
+    Returns:
+        str: "improving", "stable", or "declining".
+    """
+    if not recent_count or not earlier_count:
+        return "stable"
+
+    # Determine trend
+    diff = recent_correct / recent_count - earlier_correct / earlier_count
+    if diff > 0.1:
+        return "improving"
+    elif diff < -0.1:
+        return "declining"
+    else:
+        return "stable"
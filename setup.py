@@ -0,0 +1,29 @@
+"""
+Optional Cython build for the API hot path.
+
+Compiles the Pydantic models and route handlers into C extensions in
+pure-Python mode. The ``.py`` sources stay the source of truth; the
+compiled ``.so`` files are picked up by the import system when present.
+
+Usage:
+    uv run --extra build python setup.py build_ext --inplace
+"""
+
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name="code-craze-ext",
+    # Reason: only build the extensions; skip flat-layout package discovery
+    packages=[],
+    ext_modules=cythonize(
+        ["backend/api/models.py", "backend/api/routes.py"],
+        language_level=3,
+        compiler_directives={
+            "boundscheck": False,
+            "wraparound": False,
+            # Reason: FastAPI and Pydantic introspect signatures and annotations
+            "binding": True,
+        },
+    ),
+)